@@ -21,8 +21,10 @@ class Config:
     def __init__(self, **kwargs: Any):
         self.locale: str = kwargs.get('locale') or ''
         self.subtitles: dict = kwargs.get('subtitles') or {}
+        self.cache: dict = kwargs.get('cache') or {}
         self.credentials: dict = kwargs.get('credentials') or {}
         self.directories: dict = kwargs.get('directories') or {}
+        self.downloader: dict = kwargs.get('downloader') or {}
         self.headers: dict = kwargs.get('headers') or {}
         self.nordvpn: dict = kwargs.get('nordvpn') or {}
         self.proxies: dict = kwargs.get('proxies') or {}
@@ -48,6 +50,7 @@ class Directories:
         self.configuration = self.package_root / 'configs'
         self.downloads = self.package_root / 'downloads'
         self.cookies = self.package_root / 'cookies'
+        self.cache = self.package_root / 'cache'
         self.logs = self.package_root / 'logs'
 
 
@@ -58,6 +61,7 @@ class Filenames:
 
     def __init__(self) -> None:
         self.log = directories.logs / "{app_name}_{log_time}.log"
+        self.batch_summary = directories.logs / "{app_name}_batch_{log_time}.json"
         self.config = directories.configuration / "{service}.toml"
         self.root_config: Path = directories.package_root / "user_config.toml"
 
@@ -70,6 +74,8 @@ if not config.directories.get('cookies'):
     config.directories['cookies'] = directories.cookies
 if not config.directories.get('downloads'):
     config.directories['downloads'] = directories.downloads
+if not config.directories.get('cache'):
+    config.directories['cache'] = directories.cache
 config.directories['logs'] = directories.logs
 credentials = config.credentials
 user_agent = config.headers['User-Agent']
@@ -5,115 +5,164 @@
 This module is for service initiation mapping
 """
 
+from __future__ import annotations
+import importlib
+import logging
+from logging import INFO, DEBUG
+from typing import Optional
+from urllib.parse import urlparse
+from configs.config import filenames
 from constants import Service
-from services.kktv import KKTV
-from services.linetv import LineTV
-from services.fridayvideo import FridayVideo
-from services.catchplay import CatchPlay
-from services.crunchyroll import Crunchyroll
-from services.iqiyi.iqiyi import IQIYI
-from services.mewatch import MeWatch
-from services.myvideo import MyVideo
-from services.nowplayer import NowPlayer
-from services.wetv.wetv import WeTV
-from services.viki import Viki
-from services.viu import Viu
-from services.nowe import NowE
-from services.disneyplus.disneyplus import DisneyPlus
-from services.hbogoasia import HBOGOAsia
-from services.itunes import iTunes
-from services.appletvplus import AppleTVPlus
-from services.youtube import YouTube
+from utils.io import load_toml
 
 service_map = [
     {
         'name': Service.APPLETVPLUS,
-        'class': AppleTVPlus,
+        'class': 'services.appletvplus.AppleTVPlus',
         'domain': 'tv.apple.com',
     },
     {
         'name': Service.CATCHPLAY,
-        'class': CatchPlay,
+        'class': 'services.catchplay.CatchPlay',
         'domain': 'catchplay.com'
     },
     {
         'name': Service.CRUNCHYROLL,
-        'class': Crunchyroll,
+        'class': 'services.crunchyroll.Crunchyroll',
         'domain': 'crunchyroll.com'
     },
     {
         'name': Service.DISNEYPLUS,
-        'class': DisneyPlus,
+        'class': 'services.disneyplus.disneyplus.DisneyPlus',
         'domain': 'disneyplus.com'
     },
     {
         'name': Service.FRIDAYVIDEO,
-        'class': FridayVideo,
+        'class': 'services.fridayvideo.FridayVideo',
         'domain': 'video.friday.tw'
     },
     {
         'name': Service.HBOGOASIA,
-        'class': HBOGOAsia,
+        'class': 'services.hbogoasia.HBOGOAsia',
         'domain': 'hbogoasia'
     },
     {
         'name': Service.IQIYI,
-        'class': IQIYI,
+        'class': 'services.iqiyi.iqiyi.IQIYI',
         'domain': 'iq.com'
     },
     {
         'name': Service.ITUNES,
-        'class': iTunes,
+        'class': 'services.itunes.iTunes',
         'domain': 'itunes.apple.com',
     },
     {
         'name': Service.KKTV,
-        'class': KKTV,
+        'class': 'services.kktv.KKTV',
         'domain': 'kktv.me'
     },
     {
         'name': Service.LINETV,
-        'class': LineTV,
+        'class': 'services.linetv.LineTV',
         'domain': 'linetv.tw'
     },
     {
         'name': Service.MEWATCH,
-        'class': MeWatch,
+        'class': 'services.mewatch.MeWatch',
         'domain': 'mewatch.sg'
     },
     {
         'name': Service.MYVIDEO,
-        'class': MyVideo,
+        'class': 'services.myvideo.MyVideo',
         'domain': 'myvideo.net.tw'
     },
     {
         'name': Service.NOWE,
-        'class': NowE,
+        'class': 'services.nowe.NowE',
         'domain': 'nowe.com'
     },
     {
         'name': Service.NOWPLAYER,
-        'class': NowPlayer,
+        'class': 'services.nowplayer.NowPlayer',
         'domain': 'nowplayer.now.com'
     },
     {
         'name': Service.VIKI,
-        'class': Viki,
+        'class': 'services.viki.Viki',
         'domain': 'viki.com'
     },
     {
         'name': Service.VIU,
-        'class': Viu,
+        'class': 'services.viu.Viu',
         'domain': 'viu.com'
     },
     {
         'name': Service.WETV,
-        'class': WeTV,
+        'class': 'services.wetv.wetv.WeTV',
         'domain': 'wetv.vip'
     },
     {
         'name': Service.YOUTUBE,
-        'class': YouTube,
+        'class': 'services.youtube.YouTube',
         'domain': 'youtube.com'
     }
 ]
+
+
+def build_domain_index(services: list[dict]) -> tuple[dict, dict]:
+    """
+    Index services by domain: hostname suffix (e.g. tv.apple.com) -> service,
+    and bare name matching any tld (e.g. hbogoasia -> hbogoasia.sg, hbogoasia.hk) -> service
+    """
+
+    suffixes = {}
+    names = {}
+    for service in services:
+        domain = service['domain'].lower()
+        if '.' in domain:
+            suffixes[domain] = service
+        else:
+            names[domain] = service
+    return suffixes, names
+
+
+domain_index, name_index = build_domain_index(service_map)
+
+
+def get_service(url: str) -> Optional[dict]:
+    """
+    Get service of url by the longest matching hostname suffix,
+    e.g. https://www.tv.apple.com/... -> tv.apple.com, https://itunes.apple.com/... -> itunes.apple.com
+    """
+
+    hostname = (urlparse(url.strip()).hostname or '').lower()
+    labels = hostname.split('.')
+    for index in range(len(labels) - 1):
+        service = domain_index.get('.'.join(labels[index:]))
+        if service:
+            return service
+    return next((name_index[label] for label in labels if label in name_index), None)
+
+
+def get_service_class(service: dict) -> type:
+    """Import service class (module.ClassName) on demand"""
+
+    module_name, class_name = service['class'].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load_service(service: dict, args):
+    """Create service instance with its logger and config"""
+
+    service_class = get_service_class(service)
+    log = logging.getLogger(service_class.__module__)
+    if args.debug:
+        log.setLevel(DEBUG)
+    else:
+        log.setLevel(INFO)
+
+    args.log = log
+    args.config = load_toml(
+        str(filenames.config).format(service=service['name']))
+    args.service = service
+    return service_class(args)
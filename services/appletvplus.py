@@ -16,9 +16,9 @@ from urllib.parse import unquote, urljoin
 import m3u8
 import orjson
 from configs.config import user_agent
-from utils.io import rename_filename, download_files
+from utils.io import rename_filename, download_segments
 from utils.helper import get_all_languages, get_language_code, get_locale
-from utils.subtitle import convert_subtitle, merge_subtitle_fragments
+from utils.subtitle import convert_subtitle, merge_subtitle_segments
 from services.baseservice import BaseService
 
 
@@ -33,6 +33,8 @@ class AppleTVPlus(BaseService):
         super().__init__(args)
         self._ = get_locale(__name__, self.locale)
 
+    def set_job(self, args):
+        super().set_job(args)
         self.title_id = os.path.basename(self.url.split('?')[0])
         self.content_type = 'movies' if '/movie/' in self.url else 'shows'
 
@@ -238,7 +240,7 @@ class AppleTVPlus(BaseService):
                 lang_folder_path = os.path.join(
                     os.path.join(folder_path, sub['lang']), f"tmp_{filename.replace('.vtt', '.srt')}")
 
-            os.makedirs(lang_folder_path, exist_ok=True)
+            os.makedirs(os.path.dirname(lang_folder_path), exist_ok=True)
 
             languages.add(lang_folder_path)
 
@@ -298,14 +300,10 @@ class AppleTVPlus(BaseService):
 
     def download_subtitle(self, subtitles, languages):
         if subtitles and languages:
-            download_files(subtitles)
-
-            display = True
-            for lang_path in sorted(languages):
-                if 'tmp' in lang_path:
-                    merge_subtitle_fragments(
-                        folder_path=lang_path, filename=os.path.basename(lang_path.replace('tmp_', '')), subtitle_format=self.subtitle_format, locale=self.locale, display=display)
-                    display = False
+            segments = download_segments(subtitles)
+
+            merge_subtitle_segments(
+                segments=segments, subtitle_format=self.subtitle_format, locale=self.locale)
 
     def main(self):
         token = self.get_token()
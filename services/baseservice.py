@@ -5,11 +5,14 @@
 This module is base service
 """
 from __future__ import annotations
+import contextvars
 import html
 import os
 import re
+import shutil
 import ssl
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from http.cookiejar import MozillaCookieJar
 from typing import Optional
 from pathlib import Path
@@ -22,6 +25,9 @@ from configs.config import config, credentials, filenames, user_agent
 from constants import SUBTITLE_FORMAT
 from utils.ripprocess import RipProcess
 from utils.proxy import get_ip_info, get_proxy
+from utils.ratelimit import RateLimiter
+from utils.cache import ResponseCache
+from utils.sync import SyncManifest
 from utils.helper import EpisodesNumbersHandler
 from utils.io import get_tmdb_info
 
@@ -33,27 +39,52 @@ class BaseService(object):
 
     # list of ip regions required to use the service. empty list == global available.
     GEOFENCE: list[str] = []
+    # service skips already downloaded episodes with --sync (get_sync_manifest / update_manifest)
+    SYNC: bool = False
 
     def __init__(self, args):
         self.logger = args.log
-        self.url = args.url.strip()
         self.service = args.service
         self.platform = self.service['name']
         self.locale = args.locale
 
         self.cookies = {}
+        self.config = self.validate_config(args.config)
         self.session = requests.Session()
-        self.session.mount('https://', TLSAdapter())
+        adapter = TLSAdapter(rate_limiter=RateLimiter.from_config(self.config.get('rate_limit')),
+                             cache=ResponseCache.from_config(self.config, self.platform))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers = {
             'user-agent': user_agent
         }
-        self.config = self.validate_config(args.config)
+        self.max_workers = int(self.config.get('max_workers', 1))
+
+        self.session.cookies.update(self.cookies)
+        self.cookies = self.session.cookies.get_dict()
+
+        proxy = args.proxy or next(iter(self.GEOFENCE), None)
+        if proxy:
+            self.set_proxy(proxy)
+
+        self.ripprocess = RipProcess()
+
+        self.set_job(args)
+
+    def set_job(self, args):
+        """
+        Set url and download options, the same service instance (session, cookies, proxy)
+        can be reused for another url by calling set_job again
+        """
+
+        self.url = args.url.strip()
         self.movie = False
 
+        # kept on the instance only, jobs of other platforms may run at the same time
         if args.output and os.path.exists(args.output):
-            config.directories['downloads'] = args.output.strip()
-
-        self.download_path = config.directories['downloads']
+            self.download_path = args.output.strip()
+        else:
+            self.download_path = config.directories['downloads']
 
         if args.season:
             self.download_season = EpisodesNumbersHandler(
@@ -68,15 +99,10 @@ class BaseService(object):
             self.download_episode = []
 
         self.last_episode = args.last_episode
-
-        self.session.cookies.update(self.cookies)
-        self.cookies = self.session.cookies.get_dict()
-
-        proxy = args.proxy or next(iter(self.GEOFENCE), None)
-        if proxy:
-            self.set_proxy(proxy)
-
-        self.ripprocess = RipProcess()
+        self.sync = args.sync and self.SYNC
+        if args.sync and not self.SYNC:
+            self.logger.warning(
+                "%s does not support --sync yet, all subtitles will be downloaded again", self.platform)
 
         self.subtitle_language = self.get_language_list(args.subtitle_language)
         self.subtitle_format = self.get_subtitle_format(args.subtitle_format)
@@ -125,6 +151,64 @@ class BaseService(object):
                 f"\nPlease put {os.path.basename(cookie_file)} in {Path(config.directories['cookies'])}")
             sys.exit(1)
 
+    def run_concurrently(self, func, jobs) -> list:
+        """
+        Run jobs (tuples of func's arguments) with at most max_workers threads,
+        results are returned in the order of jobs; each job runs in a copy of the caller's context
+        (e.g. the server's current job, so that its log lines are kept)
+        """
+
+        jobs = list(jobs)
+        if self.max_workers <= 1 or len(jobs) <= 1:
+            return [func(*job) for job in jobs]
+
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            return list(executor.map(lambda job: context.copy().run(func, *job), jobs))
+
+    def reset_folder(self, folder_path):
+        """Remove previous downloads and their sync manifest, except in sync mode"""
+
+        if not self.sync:
+            if os.path.exists(folder_path):
+                shutil.rmtree(folder_path)
+            SyncManifest.get_path(folder_path).unlink(missing_ok=True)
+
+    def get_sync_manifest(self, folder_path) -> Optional[SyncManifest]:
+        """Get sync manifest of output folder, None if not in sync mode"""
+
+        if self.sync:
+            return SyncManifest(folder_path)
+        return None
+
+    def update_manifest(self, folder_path, subtitles):
+        """
+        Record downloaded subtitles (with episode_id and lang) in sync manifest after conversion,
+        subtitles which failed to download are not recorded and will be retried
+        """
+
+        manifest = self.get_sync_manifest(folder_path)
+        if not manifest:
+            return
+
+        failed = set()
+        episode_ids = set()
+        for subtitle in subtitles:
+            if 'episode_id' in subtitle and 'lang' in subtitle:
+                episode_ids.add(subtitle['episode_id'])
+                file_path = Path(subtitle.get('file_path') or os.path.join(subtitle['path'], subtitle['name']))
+                # the downloaded file is replaced by its conversion to subtitle_format
+                if file_path.with_suffix(self.subtitle_format).is_file():
+                    file_path = file_path.with_suffix(self.subtitle_format)
+                if not manifest.add(episode_id=subtitle['episode_id'],
+                                    language=subtitle['lang'],
+                                    url=subtitle['url'],
+                                    file_path=file_path):
+                    failed.add(subtitle['episode_id'])
+        for episode_id in episode_ids - failed:
+            manifest.complete(episode_id)
+        manifest.save()
+
     def set_proxy(self, proxy):
         """Set proxy: support dynamic proxy in each service"""
 
@@ -243,9 +327,52 @@ class BaseService(object):
 
 class TLSAdapter(requests.adapters.HTTPAdapter):
     """
-    Fix openssl issue
+    Fix openssl issue, throttle requests per host if a rate limiter is given,
+    and answer cacheable requests from disk if a response cache is given
     """
 
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, cache: Optional[ResponseCache] = None, **kwargs):
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        super(TLSAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        use_cache = self.cache and not kwargs.get('stream')
+
+        entry = None
+        if use_cache:
+            entry = self.cache.get(request)
+            if entry and self.cache.is_fresh(entry):
+                return self.cache.build_response(request, entry)
+            if entry:
+                self.cache.add_validators(request, entry)
+
+        response = self.send_with_rate_limit(request, **kwargs)
+
+        if use_cache:
+            entry = self.cache.set(request, response, entry)
+            if entry and response.status_code == 304:
+                response.close()
+                return self.cache.build_response(request, entry)
+        return response
+
+    def send_with_rate_limit(self, request, **kwargs):
+        if not self.rate_limiter:
+            return super(TLSAdapter, self).send(request, **kwargs)
+
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(request.url)
+            response = super(TLSAdapter, self).send(request, **kwargs)
+            if response.status_code != 429 or attempt >= self.rate_limiter.max_retries:
+                if response.status_code != 429:
+                    self.rate_limiter.success(request.url)
+                return response
+            self.rate_limiter.throttled(
+                request.url, attempt, response.headers.get('Retry-After'))
+            response.close()
+            attempt += 1
+
     def init_poolmanager(self, *args, **kwargs):
         ctx = ssl.create_default_context()
         ctx.set_ciphers('DEFAULT@SECLEVEL=1')
@@ -210,7 +210,7 @@ class CatchPlay(BaseService):
                 self.logger.debug('mpd_url: %s', mpd_url)
                 os.makedirs(folder_path, exist_ok=True)
                 self.ripprocess.download_subtitles_from_mpd(
-                    url=mpd_url, title=filename.replace('.vtt', ''), folder_path=folder_path, log_level=self.logger.level)
+                    url=mpd_url, title=filename.replace('.vtt', ''), folder_path=folder_path, log_level=self.logger.level, subtitle_format=self.subtitle_format)
         else:
             self.logger.error(res.text)
 
@@ -9,13 +9,14 @@ import os
 import math
 import shutil
 import sys
+from pathlib import Path
 from urllib.parse import urljoin
 import m3u8
 import requests
 from configs.config import credentials, user_agent
 from utils.helper import get_all_languages, get_locale
-from utils.io import rename_filename, download_files, download_audio
-from utils.subtitle import convert_subtitle, merge_subtitle_fragments
+from utils.io import rename_filename, download_segments, download_audio
+from utils.subtitle import convert_subtitle, merge_subtitle_segments
 from services.disneyplus.disneyplus_login import Login
 from services.baseservice import BaseService
 
@@ -27,14 +28,19 @@ class DisneyPlus(BaseService):
     Authorization: email & password
     """
 
+    SYNC = True
+
     def __init__(self, args):
         super().__init__(args)
         self._ = get_locale(__name__, self.locale)
 
-        self.audio_language = args.audio_language
         self.profile = dict()
         self.access_token = ''
 
+    def set_job(self, args):
+        super().set_job(args)
+        self.audio_language = args.audio_language
+
     def movie_subtitle(self):
         movie_url = self.config['api']['DmcVideo'].format(
             region=self.profile['region'],
@@ -110,9 +116,7 @@ class DisneyPlus(BaseService):
                     name = rename_filename(
                         f'{title}.S{str(season_index).zfill(2)}')
                     folder_path = os.path.join(self.download_path, name)
-
-                    if os.path.exists(folder_path):
-                        shutil.rmtree(folder_path)
+                    self.reset_folder(folder_path)
 
                     if self.last_episode:
                         self.logger.info(self._("\nSeason %s total: %s episode(s)\tdownload season %s last episode\n---------------------------------------------------------------"),
@@ -126,30 +130,35 @@ class DisneyPlus(BaseService):
                                          season_index,
                                          episode_num)
 
-                    for episode in episodes:
+                    episodes = [episode for episode in episodes
+                                if not self.download_episode or episode['episodeSequenceNumber'] in self.download_episode]
+
+                    manifest = self.get_sync_manifest(folder_path)
+                    if manifest:
+                        episodes = [episode for episode in episodes
+                                    if not manifest.has(episode['mediaMetadata']['mediaId'], self.subtitle_language)]
+
+                    playlists = self.run_concurrently(
+                        self.get_playlist, [(episode['mediaMetadata']['mediaId'],) for episode in episodes])
+
+                    for episode, (subtitle_list, audio_list) in zip(episodes, playlists):
                         episode_index = episode['episodeSequenceNumber']
-                        if not self.download_episode or episode_index in self.download_episode:
-                            program_type = episode['programType']
-                            media_id = episode['mediaMetadata']['mediaId']
-                            m3u8_url = self.get_m3u8_url(media_id)
-                            self.logger.debug(m3u8_url)
-
-                            filename = f'{name}E{str(episode_index).zfill(2)}.WEB-DL.{self.platform}.vtt'
-                            subtitle_list, audio_list = self.parse_m3u(
-                                m3u8_url)
-
-                            if not subtitle_list:
-                                self.logger.error(
-                                    self._("\nNo subtitles found!"))
-                                sys.exit(1)
-
-                            self.logger.info(
-                                self._("\nDownload: %s\n---------------------------------------------------------------"), filename)
-                            self.get_subtitle(subtitle_list, program_type,
-                                              folder_path, filename)
-                            if self.audio_language:
-                                self.get_audio(
-                                    audio_list, folder_path, filename)
+                        program_type = episode['programType']
+
+                        filename = f'{name}E{str(episode_index).zfill(2)}.WEB-DL.{self.platform}.vtt'
+
+                        if not subtitle_list:
+                            self.logger.error(
+                                self._("\nNo subtitles found!"))
+                            sys.exit(1)
+
+                        self.logger.info(
+                            self._("\nDownload: %s\n---------------------------------------------------------------"), filename)
+                        self.get_subtitle(subtitle_list, program_type,
+                                          folder_path, filename, episode['mediaMetadata']['mediaId'])
+                        if self.audio_language:
+                            self.get_audio(
+                                audio_list, folder_path, filename)
 
                     convert_subtitle(folder_path=folder_path,
                                      platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
@@ -218,6 +227,12 @@ class DisneyPlus(BaseService):
             self.logger.error(res.text)
             sys.exit(1)
 
+    def get_playlist(self, media_id):
+        """Get subtitle and audio playlists of media"""
+        m3u8_url = self.get_m3u8_url(media_id)
+        self.logger.debug(m3u8_url)
+        return self.parse_m3u(m3u8_url)
+
     def parse_m3u(self, m3u_link):
         base_url = os.path.dirname(m3u_link)
         sub_url_list = []
@@ -268,6 +283,7 @@ class DisneyPlus(BaseService):
             if sub['lang'] in self.subtitle_language or 'all' in self.subtitle_language:
                 subtitle = {}
                 subtitle['lang'] = sub['lang']
+                subtitle['m3u8_url'] = sub['m3u8_url']
                 subtitle['urls'] = []
                 segments = m3u8.load(sub['m3u8_url'])
                 for uri in segments.files:
@@ -276,10 +292,11 @@ class DisneyPlus(BaseService):
 
         return subtitle_list, audio_url_list
 
-    def get_subtitle(self, subtitle_list, program_type, folder_path, sub_name):
+    def get_subtitle(self, subtitle_list, program_type, folder_path, sub_name, episode_id=None):
 
         languages = set()
         subtitles = []
+        downloaded = []
 
         for sub in subtitle_list:
             filename = sub_name.replace('.vtt', f".{sub['lang']}.vtt")
@@ -291,9 +308,17 @@ class DisneyPlus(BaseService):
                 lang_folder_path = os.path.join(
                     os.path.join(folder_path, sub['lang']), f"tmp_{filename.replace('.vtt', '.srt')}")
 
-            os.makedirs(lang_folder_path, exist_ok=True)
+            os.makedirs(os.path.dirname(lang_folder_path), exist_ok=True)
 
             languages.add(lang_folder_path)
+            if episode_id:
+                downloaded.append({
+                    'episode_id': episode_id,
+                    'lang': sub['lang'],
+                    'url': sub['m3u8_url'],
+                    'file_path': os.path.join(os.path.dirname(lang_folder_path),
+                                              Path(filename).with_suffix(self.subtitle_format or '.srt').name)
+                })
 
             for url in sub['urls']:
                 subtitle = dict()
@@ -304,17 +329,14 @@ class DisneyPlus(BaseService):
                 subtitles.append(subtitle)
 
         self.download_subtitle(subtitles, languages)
+        self.update_manifest(folder_path, downloaded)
 
     def download_subtitle(self, subtitles, languages):
         if subtitles and languages:
-            download_files(subtitles)
-
-            display = True
-            for lang_path in sorted(languages):
-                if 'tmp' in lang_path:
-                    merge_subtitle_fragments(
-                        folder_path=lang_path, filename=os.path.basename(lang_path.replace('tmp_', '')), subtitle_format=self.subtitle_format, locale=self.locale, display=display)
-                    display = False
+            segments = download_segments(subtitles)
+
+            merge_subtitle_segments(
+                segments=segments, subtitle_format=self.subtitle_format, locale=self.locale)
 
     def get_audio(self, audio_list, folder_path, audio_name):
         for audio in audio_list:
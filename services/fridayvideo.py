@@ -13,7 +13,7 @@ import time
 from configs.config import config, credentials, user_agent
 from utils.io import rename_filename, download_files
 from utils.helper import get_locale, get_language_code
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from services.baseservice import BaseService
 
 
@@ -183,9 +183,7 @@ class FridayVideo(BaseService):
                                          season_num,
                                          episode_num)
 
-            languages = set()
-            subtitles = []
-
+            jobs = []
             for episode in episode_list:
                 if not self.download_season or episode['season_index'] in self.download_season:
                     if not self.download_episode or episode['episode_index'] in self.download_episode:
@@ -199,11 +197,13 @@ class FridayVideo(BaseService):
                             'content_id':  episode['contentId'],
                             'subtitle':  'false'
                         }
+                        jobs.append((media_info, folder_path, filename))
 
-                        subs, lang_paths = self.get_subtitle(
-                            media_info=media_info, folder_path=folder_path, filename=filename)
-                        subtitles += subs
-                        languages = set.union(languages, lang_paths)
+            languages = set()
+            subtitles = []
+            for subs, lang_paths in self.run_concurrently(self.get_subtitle, jobs):
+                subtitles += subs
+                languages = set.union(languages, lang_paths)
 
             self.download_subtitle(
                 subtitles=subtitles, languages=languages, folder_path=folder_path)
@@ -300,9 +300,8 @@ class FridayVideo(BaseService):
                        'referer': 'https://video.friday.tw/'}
             download_files(subtitles, headers)
             if languages:
-                for lang_path in sorted(languages):
-                    convert_subtitle(
-                        folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+                convert_subtitles(
+                    folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
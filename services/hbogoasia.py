@@ -16,7 +16,7 @@ from urllib.parse import urlparse
 from configs.config import credentials
 from utils.io import rename_filename, download_files
 from utils.helper import get_language_code, get_locale, get_all_languages
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from services.baseservice import BaseService
 
 
@@ -32,12 +32,15 @@ class HBOGOAsia(BaseService):
         self._ = get_locale(__name__, self.locale)
 
         self.device_id = str(uuid.uuid4())
-        self.origin = f"https://{urlparse(self.url).netloc}"
         self.territory = ""
         self.channel_partner_id = ""
         self.session_token = ""
         self.multi_profile_id = ""
 
+    def set_job(self, args):
+        super().set_job(args)
+        self.origin = f"https://{urlparse(self.url).netloc}"
+
     def get_territory(self):
         geo_url = self.config['api']['geo'].format(
             bundle_id=urlparse(self.url).netloc)
@@ -263,9 +266,8 @@ class HBOGOAsia(BaseService):
         if subtitles:
             download_files(subtitles)
             if languages:
-                for lang_path in sorted(languages):
-                    convert_subtitle(
-                        folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+                convert_subtitles(
+                    folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
@@ -17,7 +17,7 @@ from urllib.parse import urlencode
 import orjson
 from utils.helper import get_locale, get_language_code, get_all_languages
 from utils.io import download_files, rename_filename
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from utils.proxy import get_ip_info
 from services.baseservice import BaseService
 
@@ -324,9 +324,8 @@ class IQIYI(BaseService):
     def download_subtitle(self, subtitles, languages, folder_path):
         if subtitles and languages:
             download_files(subtitles)
-            for lang_path in sorted(languages):
-                convert_subtitle(
-                    folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+            convert_subtitles(
+                folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
@@ -12,9 +12,9 @@ from urllib.parse import urljoin
 import m3u8
 import orjson
 from configs.config import user_agent
-from utils.io import rename_filename, download_files
+from utils.io import rename_filename, download_segments
 from utils.helper import get_locale
-from utils.subtitle import convert_subtitle, merge_subtitle_fragments
+from utils.subtitle import convert_subtitle, merge_subtitle_segments
 from services.baseservice import BaseService
 
 
@@ -78,7 +78,7 @@ class iTunes(BaseService):
             lang_folder_path = os.path.join(
                 folder_path, f"tmp_{filename.replace('.vtt', '.srt')}")
 
-            os.makedirs(lang_folder_path, exist_ok=True)
+            os.makedirs(os.path.dirname(lang_folder_path), exist_ok=True)
 
             languages.add(lang_folder_path)
 
@@ -98,13 +98,9 @@ class iTunes(BaseService):
     def download_subtitle(self, subtitles, languages, folder_path):
         if subtitles and languages:
             self.logger.debug('subtitles: %s', subtitles)
-            download_files(subtitles)
-            display = True
-            for lang_path in sorted(languages):
-                if 'tmp' in lang_path:
-                    merge_subtitle_fragments(
-                        folder_path=lang_path, filename=os.path.basename(lang_path.replace('tmp_', '')), subtitle_format=self.subtitle_format, locale=self.locale, display=display)
-                    display = False
+            segments = download_segments(subtitles)
+            merge_subtitle_segments(
+                segments=segments, subtitle_format=self.subtitle_format, locale=self.locale)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
@@ -10,7 +10,7 @@ import re
 import sys
 from utils.io import rename_filename, download_files
 from utils.helper import get_locale
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from services.baseservice import BaseService
 
 
@@ -25,7 +25,9 @@ class KKTV(BaseService):
         super().__init__(args)
         self._ = get_locale(__name__, self.locale)
 
-        self.title_id = os.path.basename(args.url)
+    def set_job(self, args):
+        super().set_job(args)
+        self.title_id = os.path.basename(self.url)
 
     def movie_metadata(self, data):
         title = data['title'].split('(')[0].strip()
@@ -127,9 +129,8 @@ class KKTV(BaseService):
     def download_subtitle(self, subtitles, languages, folder_path):
         if subtitles and languages:
             download_files(subtitles)
-            for lang_path in sorted(languages):
-                convert_subtitle(
-                    folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+            convert_subtitles(
+                folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
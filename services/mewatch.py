@@ -14,7 +14,7 @@ from bs4 import BeautifulSoup
 from configs.config import credentials, user_agent
 from utils.io import rename_filename, download_files
 from utils.helper import get_all_languages, get_locale, get_language_code
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from services.baseservice import BaseService
 
 
@@ -183,9 +183,8 @@ class MeWatch(BaseService):
         if subtitles:
             download_files(subtitles)
             if languages:
-                for lang_path in sorted(languages):
-                    convert_subtitle(
-                        folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+                convert_subtitles(
+                    folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
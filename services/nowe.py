@@ -206,7 +206,7 @@ class NowE(BaseService):
             })
 
             self.ripprocess.download_subtitles_from_mpd(
-                url=mpd_url, title=title, folder_path=folder_path, log_level=self.logger.level, timescale=timescale)
+                url=mpd_url, title=title, folder_path=folder_path, log_level=self.logger.level, timescale=timescale, subtitle_format=self.subtitle_format)
 
         else:
             self.logger.error(res.text)
@@ -8,14 +8,13 @@ This module is to download subtitle from Viki
 import os
 from pathlib import Path
 import re
-import shutil
 import sys
 import time
 import orjson
 from configs.config import config, credentials, user_agent
 from utils.io import rename_filename, download_files
 from utils.helper import get_all_languages, get_locale, get_language_code
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from services.baseservice import BaseService
 
 
@@ -26,6 +25,8 @@ class Viki(BaseService):
     Authorization: Cookies
     """
 
+    SYNC = True
+
     def __init__(self, args):
         super().__init__(args)
         self._ = get_locale(__name__, self.locale)
@@ -121,11 +122,10 @@ class Viki(BaseService):
                                  season_index,
                                  episode_num)
 
-        if os.path.exists(folder_path):
-            shutil.rmtree(folder_path)
+        self.reset_folder(folder_path)
+        manifest = self.get_sync_manifest(folder_path)
 
-        languages = set()
-        subtitles = []
+        jobs = []
         for episode in episodes:
             episode_index = int(episode['number'])
             if not self.download_season or season_index in self.download_season:
@@ -136,34 +136,44 @@ class Viki(BaseService):
                         self.logger.error(self._(
                             "\nPlease check your subscription plan, and make sure you are able to watch it online!"))
                         break
+                    if manifest and manifest.has(episode['id'], self.subtitle_language):
+                        self.logger.debug(
+                            "Skip S%sE%s: already downloaded", str(season_index).zfill(2), str(episode_index).zfill(2))
+                        continue
                     self.logger.info(
                         f"Getting S{str(season_index).zfill(2)}E{str(episode_index).zfill(2)} subtitle...")
-                    media_info = self.get_media_info(
-                        video_id=episode['id'], filename=filename)
-                    subs, lang_paths = self.get_subtitle(
-                        media_info=media_info, folder_path=folder_path, filename=filename)
-                    if not subs:
-                        break
-                    subtitles += subs
-                    languages = set.union(languages, lang_paths)
+                    jobs.append((episode['id'], filename))
+
+        media_infos = self.run_concurrently(self.get_media_info, jobs)
+
+        languages = set()
+        subtitles = []
+        for (video_id, filename), media_info in zip(jobs, media_infos):
+            subs, lang_paths = self.get_subtitle(
+                media_info=media_info, folder_path=folder_path, filename=filename)
+            if not subs:
+                break
+            for sub in subs:
+                sub['episode_id'] = video_id
+            subtitles += subs
+            languages = set.union(languages, lang_paths)
 
         self.download_subtitle(
             subtitles=subtitles, languages=languages, folder_path=folder_path)
 
     def get_media_info(self, video_id, filename):
-        """Get media info"""
-        self.session.headers.update({
+        """Get media info (headers are passed per request, since it runs in worker threads)"""
+        headers = {
             'x-viki-app-ver': self.config['vmplayer']['version'],
             'x-client-user-agent': user_agent,
             'x-viki-as-id': self.cookies['session__id']
-        })
+        }
         media_info_url = self.config['api']['videos'].format(
             video_id=video_id)
 
-        res = self.session.get(url=media_info_url, timeout=5)
+        res = self.session.get(url=media_info_url, headers=headers, timeout=5)
         if res.ok:
             data = res.json()
-            time.sleep(1)  # Avoid http 429 too many request
             if 'video' in data:
                 self.logger.debug("media_info: %s", data)
                 return data
@@ -204,7 +214,8 @@ class Viki(BaseService):
                             subtitles.append({
                                 'name': filename.replace('.vtt', f'.{sub_lang}.vtt'),
                                 'path': lang_folder_path,
-                                'url': sub['src']
+                                'url': sub['src'],
+                                'lang': sub_lang
                             })
 
                 get_all_languages(available_languages=available_languages,
@@ -221,10 +232,10 @@ class Viki(BaseService):
     def download_subtitle(self, subtitles, folder_path, languages=None):
         if subtitles:
             download_files(subtitles)
-            if languages:
-                for lang_path in sorted(languages):
-                    convert_subtitle(
-                        folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+            convert_subtitles(
+                folder_paths=set(languages or ()) | {folder_path}, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
+            # after conversion, so that the files which stay are recorded
+            self.update_manifest(folder_path, subtitles)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
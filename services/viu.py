@@ -11,9 +11,9 @@ import shutil
 import sys
 import orjson
 from configs.config import user_agent
-from utils.io import rename_filename, download_files
+from utils.io import rename_filename, download_files, download_segments
 from utils.helper import get_all_languages, get_locale, get_language_code
-from utils.subtitle import convert_subtitle, merge_subtitle_fragments
+from utils.subtitle import convert_subtitle, merge_subtitle_segments, convert_subtitles
 from services.baseservice import BaseService
 
 
@@ -173,13 +173,15 @@ class Viu(BaseService):
 
                 subtitle['url'] = sub['url'].replace('\\/', '/')
                 subtitle['segment'] = False
+                subtitle_path = lang_folder_path
                 if 'second_subtitle_url' in sub and sub['second_subtitle_url']:
-                    lang_folder_path = os.path.join(
+                    # merged in memory with the comment into lang_folder_path (no tmp_ folder is created)
+                    subtitle_path = os.path.join(
                         lang_folder_path, f"tmp_{subtitle_filename.replace('.vtt', '.srt')}")
                     subtitle['segment'] = True
 
                 subtitle['name'] = subtitle_filename
-                subtitle['path'] = lang_folder_path
+                subtitle['path'] = subtitle_path
                 subtitles.append(subtitle)
 
                 if 'second_subtitle_url' in sub and sub['second_subtitle_url']:
@@ -188,7 +190,7 @@ class Viu(BaseService):
                     second_subtitle['url'] = sub['second_subtitle_url'].replace(
                         '\\/', '/')
                     second_subtitle['name'] = subtitle_filename
-                    second_subtitle['path'] = lang_folder_path
+                    second_subtitle['path'] = subtitle_path
                     subtitles.append(second_subtitle)
 
                 lang_paths.add(lang_folder_path)
@@ -233,15 +235,12 @@ class Viu(BaseService):
     def download_subtitle(self, subtitles, languages, folder_path):
         if subtitles and languages:
             self.logger.debug('subtitles: %s', subtitles)
-            download_files(subtitles)
-            display = True
-            for lang_path in sorted(languages):
-                if 'tmp' in lang_path:
-                    merge_subtitle_fragments(
-                        folder_path=lang_path, filename=os.path.basename(lang_path.replace('tmp_', '')), subtitle_format=self.subtitle_format, locale=self.locale, display=display)
-                    display = False
-                convert_subtitle(
-                    folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+            download_files(
+                [subtitle for subtitle in subtitles if not subtitle['segment']])
+            merge_subtitle_segments(segments=download_segments([subtitle for subtitle in subtitles if subtitle['segment']]),
+                                    subtitle_format=self.subtitle_format, locale=self.locale)
+            convert_subtitles(
+                folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
 
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
@@ -17,7 +17,7 @@ import orjson
 from configs.config import user_agent
 from utils.io import rename_filename, download_files
 from utils.helper import get_locale, get_language_code, get_all_languages
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from services.baseservice import BaseService
 from services.wetv.ckey import CKey
 
@@ -249,9 +249,8 @@ class WeTV(BaseService):
     def download_subtitle(self, subtitles, languages, folder_path):
         if subtitles and languages:
             download_files(subtitles)
-            for lang_path in sorted(languages):
-                convert_subtitle(
-                    folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+            convert_subtitles(
+                folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
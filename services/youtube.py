@@ -15,7 +15,7 @@ from yt_dlp.utils import DownloadError
 from services.baseservice import BaseService
 from utils.helper import get_all_languages, get_language_code, get_locale
 from utils.io import download_files, rename_filename
-from utils.subtitle import convert_subtitle
+from utils.subtitle import convert_subtitle, convert_subtitles
 from configs.config import config, credentials, user_agent
 
 
@@ -182,9 +182,8 @@ class YouTube(BaseService):
         if subtitles:
             download_files(subtitles)
             if languages:
-                for lang_path in sorted(languages):
-                    convert_subtitle(
-                        folder_path=lang_path, subtitle_format=self.subtitle_format, locale=self.locale)
+                convert_subtitles(
+                    folder_paths=languages, subtitle_format=self.subtitle_format, locale=self.locale, platform=self.platform)
             convert_subtitle(folder_path=folder_path,
                              platform=self.platform, subtitle_format=self.subtitle_format, locale=self.locale)
 
@@ -7,16 +7,16 @@ This module is to download subtitle from stream services.
 from __future__ import annotations
 import argparse
 import logging
-from logging import INFO, DEBUG
 from datetime import datetime
 import os
 import sys
 import validators
 from configs.config import app_name, __version__, directories, filenames
 from constants import Service
-from services import service_map
+from services import get_service, load_service
+from utils.batch import BatchRunner
+from utils.server import JobServer
 from utils.helper import get_locale
-from utils.io import load_toml
 
 
 def main() -> None:
@@ -30,7 +30,20 @@ def main() -> None:
             support_services),
         add_help=False)
     parser.add_argument('url',
+                        nargs='?',
                         help=_("series's/movie's url"))
+    parser.add_argument('-b',
+                        '--batch',
+                        dest='batch',
+                        help=_("file of urls to download, one per line with optional -s/-e/-l/-slang/-alang/-o; - for stdin"))
+    parser.add_argument('--summary',
+                        dest='summary',
+                        help=_("path of batch summary (json)"))
+    parser.add_argument('--serve',
+                        dest='serve',
+                        nargs='?',
+                        const='127.0.0.1:8765',
+                        help=_("run as local HTTP/JSON server on [host:]port (default: 127.0.0.1:8765)"))
     parser.add_argument('-s',
                         '--season',
                         dest='season',
@@ -44,6 +57,10 @@ def main() -> None:
                         dest='last_episode',
                         action='store_true',
                         help=_("download the latest episode"))
+    parser.add_argument('--sync',
+                        dest='sync',
+                        action='store_true',
+                        help=_("only download episodes and languages which haven't been downloaded (Disney+, Viki)"))
     parser.add_argument('-o',
                         '--output',
                         dest='output',
@@ -116,28 +133,25 @@ def main() -> None:
 
     start = datetime.now()
 
-    if not validators.url(args.url):
+    if args.serve:
+        JobServer(args).serve(args.serve)
+        sys.exit(0)
+
+    if args.batch:
+        BatchRunner(args).run(batch=args.batch, summary_path=args.summary)
+        logging.info("\n%s took %s seconds", app_name,
+                     int(float((datetime.now() - start).total_seconds())))
+        sys.exit(0)
+
+    if not args.url or not validators.url(args.url):
         logging.warning(
             _("\nPlease input correct url!"))
         sys.exit(0)
 
-    service = next((service for service in service_map
-                   if service['domain'] in args.url), None)
+    service = get_service(args.url)
 
     if service:
-        log = logging.getLogger(service['class'].__module__)
-        if args.debug:
-            log.setLevel(DEBUG)
-        else:
-            log.setLevel(INFO)
-
-        service_config = load_toml(
-            str(filenames.config).format(service=service['name']))
-
-        args.log = log
-        args.config = service_config
-        args.service = service
-        service['class'](args).main()
+        load_service(service, args).main()
     else:
         logging.warning(
             _("\nOnly support downloading subtitles from %s ,and etc."), support_services)
@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to test reading batch jobs.
+"""
+import argparse
+from utils.batch import read_jobs
+
+
+def test_per_line_options_do_not_leak():
+    args = argparse.Namespace(season=None, episode=None, last_episode=False, subtitle_language='en',
+                              audio_language=None, output=None, subtitle_format='', sync=False)
+    jobs = read_jobs(['# comment', '',
+                      'https://www.viki.com/tv/1 -s 1 -o /tmp/viki -alang ja',
+                      'https://www.disneyplus.com/series/x/1 -slang all',
+                      'not-a-url'], args)
+
+    assert [job['line'] for job in jobs] == [3, 4, 5]
+    assert (jobs[0]['args'].season, jobs[0]['args'].output, jobs[0]['args'].audio_language) == ('1', '/tmp/viki', 'ja')
+    assert (jobs[1]['args'].season, jobs[1]['args'].output, jobs[1]['args'].audio_language) == (None, None, None)
+    assert jobs[1]['args'].subtitle_language == 'all'
+    assert args.output is None and args.subtitle_language == 'en'
+    assert jobs[2]['service'] is None
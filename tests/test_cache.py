@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to test the on-disk response cache.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from utils.cache import ResponseCache, api_pattern
+
+
+def get_request(url, headers=None) -> requests.PreparedRequest:
+    return requests.Request('GET', url, headers=headers).prepare()
+
+
+def get_response(request, content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = request.url
+    response._content = content
+    return response
+
+
+def test_key_varies_by_credentials(tmp_path):
+    cache = ResponseCache(tmp_path, [(api_pattern('https://example.com/episodes/{id}'), 60)])
+    url = 'https://example.com/episodes/1'
+    keys = {cache.get_key(get_request(url)),
+            cache.get_key(get_request(url, {'Authorization': 'Bearer a'})),
+            cache.get_key(get_request(url, {'Authorization': 'Bearer b'})),
+            cache.get_key(get_request(url, {'Cookie': 'session=a'}))}
+    assert len(keys) == 4
+
+
+def test_concurrent_set(tmp_path):
+    cache = ResponseCache(tmp_path, [(api_pattern('https://example.com/episodes/{id}'), 60)])
+    request = get_request('https://example.com/episodes/1')
+
+    def store(index):
+        return cache.set(request, get_response(request, b'x' * 100000 + str(index).encode()))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(store, range(64)))
+
+    assert cache.get(request)['url'] == request.url
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_cached_response_can_be_iterated(tmp_path):
+    cache = ResponseCache(tmp_path, [(api_pattern('https://example.com/episodes/{id}'), 60)])
+    request = get_request('https://example.com/episodes/1')
+    cache.set(request, get_response(request, b'line 1\nline 2\n'))
+
+    response = cache.build_response(request, cache.get(request))
+    assert b''.join(response.iter_content(chunk_size=4)) == b'line 1\nline 2\n'
+    assert list(response.iter_lines()) == [b'line 1', b'line 2']
+    assert response.raw.read() == b'line 1\nline 2\n'
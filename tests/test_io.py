@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to test downloading files over the shared connection pool against a local stand-in server.
+"""
+import asyncio
+from aiohttp import web
+from utils.io import fetch_files
+
+BODY = b'WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nHello\n'
+
+
+async def subtitle(request):
+    return web.Response(body=BODY)
+
+
+async def broken(request):
+    response = web.StreamResponse(headers={'Content-Length': str(len(BODY) * 10)})
+    await response.prepare(request)
+    await response.write(BODY)
+    request.transport.close()
+    return response
+
+
+def download(downloads: list) -> list:
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/subtitle.vtt', subtitle)
+        app.router.add_route('*', '/broken.vtt', broken)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            return await fetch_files([(f'http://127.0.0.1:{port}{path}', output_path) for path, output_path in downloads],
+                                     {}, 2, False)
+        finally:
+            await runner.cleanup()
+    return asyncio.run(run())
+
+
+def test_unwritable_file_fails_alone(tmp_path):
+    results = download([('/subtitle.vtt', str(tmp_path)),
+                        ('/subtitle.vtt', str(tmp_path / 'S01E01.vtt'))])
+
+    assert results == [None, True]
+    assert (tmp_path / 'S01E01.vtt').read_bytes() == BODY
+
+
+def test_interrupted_download_leaves_no_file(tmp_path):
+    results = download([('/broken.vtt', str(tmp_path / 'S01E01.vtt')),
+                        ('/subtitle.vtt', str(tmp_path / 'S01E02.vtt'))])
+
+    assert results == [None, True]
+    assert not (tmp_path / 'S01E01.vtt').exists()
+    assert (tmp_path / 'S01E02.vtt').read_bytes() == BODY
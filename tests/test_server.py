@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to test the local HTTP/JSON job server against local stand-in servers.
+"""
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import orjson
+import pytest
+import requests
+from services.baseservice import BaseService
+from utils.server import JobServer, get_request_handler
+
+logger = logging.getLogger(__name__)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Stand-in of a streaming service's subtitle server"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = f'WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n{self.path}\n'.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def start(httpd: ThreadingHTTPServer) -> str:
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    return f'http://127.0.0.1:{httpd.server_address[1]}'
+
+
+@pytest.fixture(name='api')
+def fixture_api():
+    logging.getLogger().setLevel(logging.INFO)
+    stand_in = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    stand_in_url = start(stand_in)
+
+    args = argparse.Namespace(season=None, episode=None, last_episode=False, subtitle_language='en',
+                              audio_language=None, output=None, subtitle_format='', sync=False)
+    server = JobServer(args)
+    service = SimpleNamespace(max_workers=4)
+
+    def run_job(job):
+        """Fetch subtitles of the job's episodes from the stand-in server on run_concurrently threads"""
+
+        job['status'] = 'running'
+
+        def fetch(episode):
+            text = requests.get(f'{stand_in_url}/episode/{episode}', timeout=5).text
+            logger.info("fetched %s", text.splitlines()[-1])
+            return text
+
+        episodes = [(episode,) for episode in range(1, int(job['args'].episode or 1) + 1)]
+        job['result'] = BaseService.run_concurrently(service, fetch, episodes)
+        job['status'] = 'done'
+
+    server.runner.run_job = run_job
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), get_request_handler(server))
+    yield SimpleNamespace(url=start(httpd), server=server)
+    httpd.shutdown()
+    stand_in.shutdown()
+
+
+def test_job_progress_includes_worker_threads(api):
+    res = requests.post(f'{api.url}/jobs', json={'url': 'https://www.viki.com/tv/1-x', 'season': 1, 'episode': 6},
+                        timeout=5)
+    assert res.status_code == 202
+    job_id = res.json()['id']
+    assert api.server.jobs[job_id]['args'].season == '1'
+
+    lines = [orjson.loads(line) for line in requests.get(
+        f'{api.url}/jobs/{job_id}/progress', timeout=10).iter_lines()]
+    assert lines[-1]['status'] == 'done'
+    assert sorted(line['message'] for line in lines[:-1]) == \
+        sorted(f'fetched /episode/{episode}' for episode in range(1, 7))
+
+    assert requests.get(f'{api.url}/jobs/{job_id}', timeout=5).json()['status'] == 'done'
+
+
+@pytest.mark.parametrize('options', [
+    {'season': 1},
+    {'url': 'https://www.viki.com/tv/1-x', 'sync': 'yes'},
+    {'url': 'https://www.viki.com/tv/1-x', 'season': [1, 2]},
+    {'url': 'https://www.viki.com/tv/1-x', 'unknown': 1},
+])
+def test_invalid_options(api, options):
+    res = requests.post(f'{api.url}/jobs', json=options, timeout=5)
+    assert res.status_code == 400
+    assert not api.server.jobs
+
+
+def test_unsupported_url(api):
+    res = requests.post(f'{api.url}/jobs', json={'url': 'https://example.com/tv/1'}, timeout=5)
+    assert res.status_code == 400
+    assert res.json()['status'] == 'unsupported'
+
+
+def test_finished_jobs_are_dropped(api, monkeypatch):
+    monkeypatch.setattr('utils.server.MAX_FINISHED_JOBS', 2)
+    for _ in range(5):
+        requests.post(f'{api.url}/jobs', json={'url': 'https://example.com/tv/1'}, timeout=5)
+    assert len(api.server.jobs) <= 3
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to test building and converting subtitles.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import pysubs2
+import pytest
+from configs.config import config
+from utils import subtitle
+from utils.subtitle import convert_cues_to_subtitle, convert_list_to_subtitle, format_subtitle, ms_to_timestamp, set_ass_style
+from tools.pyshaka.main import CompactCue, format_cue, toMilliseconds
+
+
+TEXTS = [
+    'plain text',
+    '<b>bold</b> text',
+    '< b >spaced bold< / b >',
+    '<i>italic</i>\\Nsecond line',
+    '<u>underline</u> <s>strike</s>',
+    '<font color="#ffffff">font</font> <c.yellow>class</c>',
+    '{\\an8}top line',
+    '  padded\\n  ',
+    'first\nsecond\nthird',
+    '',
+    '   ',
+    'line\n5',
+    '中文字幕<b>粗體</b>',
+    'a < b and c > d',
+]
+
+
+def convert_list_to_subtitle_by_srt(subs):
+    """Baseline: build .srt text and parse it with pysubs2"""
+
+    text = ''
+    for index, sub in enumerate(subs):
+        text += f"{index + 1}\n{ms_to_timestamp(sub.start)} --> {ms_to_timestamp(sub.end)}\n"
+        text += sub.text.replace('\\n', '\n').replace('\\N', '\n').strip() + '\n\n'
+    return pysubs2.SSAFile.from_string(text)
+
+
+def get_events(texts):
+    return [pysubs2.SSAEvent(start=index * 1000, end=index * 1000 + 900, text=text)
+            for index, text in enumerate(texts)]
+
+
+@pytest.mark.parametrize('subtitle_format', ['srt', 'ass'])
+@pytest.mark.parametrize('texts', [TEXTS, TEXTS[::-1]] + [[text] for text in TEXTS])
+def test_convert_list_to_subtitle(texts, subtitle_format):
+    expected = convert_list_to_subtitle_by_srt(get_events(texts))
+    subs = convert_list_to_subtitle(get_events(texts))
+    assert subs.to_string(subtitle_format, keep_unknown_html_tags=True, keep_ssa_tags=True) == \
+        expected.to_string(subtitle_format, keep_unknown_html_tags=True, keep_ssa_tags=True)
+
+
+def test_convert_list_to_subtitle_clamps_time():
+    events = [pysubs2.SSAEvent(start=-500, end=400000000, text='out of range')]
+    assert convert_list_to_subtitle(events).to_string('srt') == \
+        convert_list_to_subtitle_by_srt(events).to_string('srt')
+
+
+@pytest.mark.parametrize('subtitle_format', ['.srt', '.ass'])
+def test_convert_cues_to_subtitle(subtitle_format):
+    cues = [CompactCue(index + 0.25, index + 0.75, text, 'line:90%' if index % 2 else '')
+            for index, text in enumerate(text.replace('\\N', '\n') for text in TEXTS)
+            if text.strip()]
+
+    # Baseline: pyshaka writes .vtt, which is loaded by pysubs2 and saved as subtitle_format
+    vtt = 'WEBVTT\n\n' + '\n\n'.join(format_cue(cue) for cue in cues) + '\n'
+    expected = format_subtitle(pysubs2.SSAFile.from_string(vtt))
+    subs = format_subtitle(convert_cues_to_subtitle(
+        (toMilliseconds(cue.startTime), toMilliseconds(cue.endTime), cue.payload) for cue in cues))
+    if subtitle_format == '.ass':
+        expected = set_ass_style(expected)
+        subs = set_ass_style(subs)
+
+    assert subs.to_string(subtitle_format[1:], keep_unknown_html_tags=True, keep_ssa_tags=True) == \
+        expected.to_string(subtitle_format[1:], keep_unknown_html_tags=True, keep_ssa_tags=True)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_convert_subtitles_caches_encoding_by_platform(tmp_path, monkeypatch, workers):
+    monkeypatch.setitem(config.subtitles, 'workers', workers)
+    monkeypatch.setattr(subtitle, 'encoding_cache', {})
+    text = ''.join(f'{index}\n00:00:{index:02},000 --> 00:00:{index:02},500\n你好嗎？我很好，謝謝。\n\n'
+                   for index in range(1, 50))
+    for language in ('zh-Hant', 'zh-Hans'):
+        (tmp_path / language).mkdir()
+        for episode in (1, 2):
+            (tmp_path / language / f'S01E0{episode}.vtt').write_bytes(
+                ('WEBVTT\n\n' + text.replace(',', '.')).encode('big5'))
+
+    subtitle.convert_subtitles([str(tmp_path / 'zh-Hant'), str(tmp_path / 'zh-Hans')], '.srt', platform='KKTV')
+
+    assert subtitle.encoding_cache == {('.vtt', 'KKTV'): 'Big5'}
+    for language in ('zh-Hant', 'zh-Hans'):
+        assert '你好嗎' in (tmp_path / language / 'S01E02.srt').read_text('utf-8')
+
+
+def test_convert_subtitles_from_thread(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.subtitles, 'workers', 2)
+    for episode in (1, 2):
+        (tmp_path / f'S01E0{episode}.vtt').write_text('WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nHello\n', 'utf-8')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(subtitle.convert_subtitles, [str(tmp_path)], '.srt').result(timeout=60)
+
+    for episode in (1, 2):
+        assert 'Hello' in (tmp_path / f'S01E0{episode}.srt').read_text('utf-8')
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to test the sync manifest.
+"""
+from types import SimpleNamespace
+from services.baseservice import BaseService
+from utils.sync import SyncManifest
+
+
+def test_failed_download_is_not_recorded(tmp_path):
+    (tmp_path / 'E01.en.vtt').write_text('WEBVTT\n', encoding='utf-8')
+    (tmp_path / 'E01.ja.vtt').write_bytes(b'')
+
+    manifest = SyncManifest(tmp_path)
+    assert manifest.add('1', 'en', 'https://example.com/en.vtt', tmp_path / 'E01.en.vtt')
+    assert not manifest.add('1', 'ja', 'https://example.com/ja.vtt', tmp_path / 'E01.ja.vtt')
+    assert not manifest.add('1', 'ko', 'https://example.com/ko.vtt', tmp_path / 'E01.ko.vtt')
+    manifest.save()
+
+    manifest = SyncManifest(tmp_path)
+    assert manifest.has('1', ['en'])
+    assert not manifest.has('1', ['en', 'ja'])
+    assert not manifest.has('1', ['all'])
+
+
+def test_all_languages_need_completed_episode(tmp_path):
+    (tmp_path / 'E01.en.vtt').write_text('WEBVTT\n', encoding='utf-8')
+
+    manifest = SyncManifest(tmp_path)
+    manifest.add('1', 'en', 'https://example.com/en.vtt', tmp_path / 'E01.en.vtt')
+    assert not manifest.has('1', ['all'])
+    manifest.complete('1')
+    manifest.save()
+
+    assert SyncManifest(tmp_path).has('1', ['all'])
+
+
+def test_manifest_is_not_archived(tmp_path):
+    folder_path = tmp_path / 'Show.S01'
+    folder_path.mkdir()
+    (folder_path / 'E01.en.srt').write_text('1\n', encoding='utf-8')
+
+    manifest = SyncManifest(folder_path)
+    manifest.add('1', 'en', 'https://example.com/en.vtt', folder_path / 'E01.en.srt')
+    manifest.save()
+
+    assert sorted(path.name for path in folder_path.iterdir()) == ['E01.en.srt']
+    assert SyncManifest(folder_path).has('1', ['en'])
+
+
+def test_converted_file_is_recorded(tmp_path):
+    (tmp_path / 'E01.en.srt').write_text('1\n00:00:01,000 --> 00:00:02,000\nHello\n', encoding='utf-8')
+    service = SimpleNamespace(subtitle_format='.srt', get_sync_manifest=SyncManifest)
+
+    BaseService.update_manifest(service, tmp_path, [{
+        'episode_id': '1', 'lang': 'en', 'url': 'https://example.com/en.vtt',
+        'path': str(tmp_path), 'name': 'E01.en.vtt'}])
+
+    recorded = SyncManifest(tmp_path).episodes['1']['en']
+    assert recorded['file'] == 'E01.en.srt'
+    assert recorded['size'] == (tmp_path / 'E01.en.srt').stat().st_size
+    assert SyncManifest(tmp_path).has('1', ['all'])
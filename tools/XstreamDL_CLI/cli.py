@@ -85,6 +85,8 @@ def command_handler(args: CmdArgs):
     logger.debug(f'ffmpeg {args.ffmpeg}')
     logger.debug(f'mp4decrypt {args.mp4decrypt}')
     logger.debug(f'mp4box {args.mp4box}')
+    args.stream_types = [_.strip().lower()
+                         for _ in args.stream_types.split(',') if _.strip() != '']
     try:
         args.redl_code = [int(_.strip())
                           for _ in args.redl_code.split(',') if _ != '']
@@ -140,6 +142,8 @@ def main():
                         help='choose all audio stream to download')
     parser.add_argument('--all-subtitles', action='store_true',
                         help='choose all subtitle stream to download')
+    parser.add_argument('--stream-types', default='',
+                        help='only parse these types of stream from manifest, e.g. subtitle or video,audio, default is all')
     parser.add_argument('--service', default='',
                         help='set serviceLocation for BaseURL choose')
     parser.add_argument('--save-dir', default='Downloads',
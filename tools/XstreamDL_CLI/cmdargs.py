@@ -23,6 +23,7 @@ class CmdArgs:
         self.all_videos = None # type: bool
         self.all_audios = None # type: bool
         self.all_subtitles = None # type: bool
+        self.stream_types = None # type: list
         self.service = None # type: str
         self.save_dir = None # type: Path
         self.ffmpeg = None # type: str
@@ -117,6 +117,11 @@ def get_left_segments(stream: Stream):
     completed = 0
     _left_segments = []
     for segment in stream.segments:
+        if segment.consumed:
+            # 已经交给consumer处理 同样视为下载成功
+            count += 1
+            completed += segment.filesize
+            continue
         segment_path = segment.get_path()
         if segment_path.exists() is True:
             # 文件落盘 说明下载一定成功了
@@ -567,6 +572,8 @@ class Downloader:
         '''
         解密部分
         '''
+        if stream.consumer is not None:
+            return self.consume(segment, stream)
         if self.args.disable_auto_decrypt is True:
             logger.debug(f'--disable-auto-decrypt, skip decrypt')
             return segment.dump()
@@ -578,3 +585,22 @@ class Downloader:
             return cipher.decrypt(segment)
         else:
             return segment.dump()
+
+    def consume(self, segment: Segment, stream: Stream) -> bool:
+        '''
+        解密后直接交给consumer 分段不落盘
+        '''
+        data = b''.join(segment.content)
+        segment.content = []
+        try:
+            if self.args.disable_auto_decrypt is False and segment.is_encrypt() and segment.is_supported_encryption():
+                cipher = CommonAES(
+                    segment.xkey.key, binascii.a2b_hex(segment.xkey.iv))
+                data = cipher.decrypt_content(data)
+            stream.consumer(segment, data)
+        except Exception as e:
+            logger.error(f'consume {segment.name} error', exc_info=e)
+            return False
+        segment.consumed = True
+        segment.filesize = len(data)
+        return True
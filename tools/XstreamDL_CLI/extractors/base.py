@@ -5,6 +5,13 @@ from tools.XstreamDL_CLI.log import setup_logger
 
 logger = setup_logger('XstreamDL', level='INFO')
 
+# 各类清单中字幕流类型的不同写法
+STREAM_TYPE_ALIASES = {
+    'text': 'subtitle',
+    'subtitles': 'subtitle',
+    'closed-captions': 'subtitle',
+}
+
 
 class BaseParser:
     def __init__(self, args: CmdArgs, uri_type: str):
@@ -25,6 +32,18 @@ class BaseParser:
         # logger.debug(f'fix name after: {name}')
         return name
 
+    def is_selected_type(self, stream_type: str) -> bool:
+        '''
+        --stream-types 只展开指定类型的流 无法确定类型的流仍然解析
+        '''
+        if not self.args.stream_types or not stream_type:
+            return True
+        stream_type = stream_type.lower()
+        stream_type = STREAM_TYPE_ALIASES.get(stream_type, stream_type)
+        if stream_type not in ['video', 'audio', 'subtitle']:
+            return True
+        return stream_type in self.args.stream_types
+
     def dump_content(self, name: str, content: str, suffix: str):
         if self.args.no_metadata_file:
             return
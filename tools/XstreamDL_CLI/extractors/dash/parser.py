@@ -181,6 +181,10 @@ class DASHParser(BaseParser):
                 logger.debug(
                     f'skip parse for AdaptationSet mimeType image/jpeg')
                 continue
+            if self.is_selected_type(adaptationset.get_contenttype()) is False:
+                logger.debug(
+                    f'skip parse for AdaptationSet contentType {adaptationset.get_contenttype()}')
+                continue
             representations = adaptationset.find(
                 'Representation')  # type: List[Representation]
             if len(representations) > 0:
@@ -241,6 +245,9 @@ class DASHParser(BaseParser):
             Roles = adaptationset.find('Role')  # type: List[Role]
             if stream.stream_type == '' and len(Roles) > 0:
                 stream.set_stream_type(Roles[0].value)
+            # 类型确定后再生成分段 未选择的流不展开
+            if self.is_selected_type(stream.stream_type) is False:
+                continue
             segmentlists = representation.find(
                 'SegmentList')  # type: List[SegmentList]
             r_segmenttemplates = representation.find(
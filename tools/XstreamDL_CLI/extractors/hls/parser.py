@@ -166,6 +166,11 @@ class HLSParser(BaseParser):
         _stream_paths = []
         _streams = []  # type: List[HLSStream]
         for stream in streams:
+            # 未选择类型的子流/外挂媒体 不再加载详细内容
+            if stream.tag == '#EXT-X-STREAM-INF' and self.is_selected_type(stream.stream_type or 'video') is False:
+                continue
+            if stream.tag == '#EXT-X-MEDIA' and self.is_selected_type(stream.stream_type) is False:
+                continue
             # 去重
             if stream.tag == '#EXT-X-STREAM-INF':
                 stream_path = stream.get_path()
@@ -35,6 +35,9 @@ class MSSParser(BaseParser):
         # 遍历处理streamindexs
         streams = []  # type: List[MSSStream]
         for streamindex in streamindexs:
+            if self.is_selected_type(streamindex.Type) is False:
+                logger.debug(f'skip parse for StreamIndex Type {streamindex.Type}')
+                continue
             streams.extend(self.walk_qualitylevel(
                 streamindex, ism, len(streams), uri_item))
         # 处理空分段
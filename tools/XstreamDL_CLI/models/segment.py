@@ -34,6 +34,8 @@ class Segment:
         self.skip_concat = False
         # 直播流 单个分段 最大404次数
         self.max_retry_404 = 5
+        # 内容已直接交给流的consumer 没有落盘
+        self.consumed = False
 
     def is_ism(self) -> bool:
         ''' 请重写 '''
@@ -2,7 +2,7 @@ import os
 import json
 import shutil
 from urllib.parse import urlparse
-from typing import List
+from typing import Callable, List
 from pathlib import Path
 from datetime import datetime
 from tools.XstreamDL_CLI.cmdargs import CmdArgs
@@ -57,6 +57,8 @@ class Stream:
         self.stream_type = ''  # type: str
         self.model = ''
         self.suffix = '.mp4'
+        # 设置后分段下载完成直接交给consumer处理 不再落盘
+        self.consumer = None  # type: Callable[[Segment, bytes], None]
 
     def segments_extend(self, segments: List[Segment], has_init: bool = False, name_from_url: bool = False):
         '''
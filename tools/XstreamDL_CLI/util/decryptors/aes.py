@@ -14,13 +14,16 @@ class CommonAES:
         if self.aes_iv is None:
             self.aes_iv = bytes([0] * 16)
 
+    def decrypt_content(self, content: bytes) -> bytes:
+        cipher = AES.new(self.aes_key, AES.MODE_CBC, iv=self.aes_iv)
+        return cipher.decrypt(content)
+
     def decrypt(self, segment: Segment) -> bool:
         '''
         解密 落盘
         '''
         try:
-            cipher = AES.new(self.aes_key, AES.MODE_CBC, iv=self.aes_iv)
-            content = cipher.decrypt(b''.join(segment.content))
+            content = self.decrypt_content(b''.join(segment.content))
             segment.content = []
         except Exception as e:
             print(f'decrypt {segment.name} error -> {e}')
@@ -0,0 +1,373 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to time hot paths of a source tree and measure their memory, e.g. before and after a change:
+    git worktree add /tmp/before <commit>^
+    python tools/benchmark.py startup --root /tmp/before
+    python tools/benchmark.py startup
+"""
+
+import argparse
+import inspect
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def best_of(func, repeat: int, setup=None) -> float:
+    """
+    Best wall time of func in seconds, setup() result is passed to func and not timed
+    """
+    times = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_python(root: Path, code: str) -> None:
+    """
+    Run code in a fresh interpreter of root
+    """
+    subprocess.run([sys.executable, '-c', code], cwd=root, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def peak_rss(root: Path, *args: str) -> tuple:
+    """
+    Peak RSS and output of a python child of root, as ru_maxrss of the children of a fresh wrapper process
+    """
+    wrapper = ("import resource, subprocess, sys\n"
+               "output = subprocess.run([sys.executable] + sys.argv[1:], check=True, text=True,\n"
+               "                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout\n"
+               "print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+               "print(output, end='')\n")
+    rss, _, output = subprocess.run([sys.executable, '-c', wrapper, *args], cwd=root, check=True,
+                                    capture_output=True, text=True).stdout.partition('\n')
+    # ru_maxrss is in KiB on Linux
+    return f'{int(rss) / 1024:.1f} MiB', output
+
+
+# Optional dependencies replaced by empty modules when they are not installed,
+# so that trees which import every service at startup can still be measured
+STUB_MODULES = ('yt_dlp',)
+STUB_CODE = f"""
+import importlib.abc, importlib.util, sys, types
+stubbed = set()
+
+class StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, name, path, target=None):
+        if name.split('.')[0] in {STUB_MODULES!r}:
+            stubbed.add(name.split('.')[0])
+            return importlib.util.spec_from_loader(name, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        module = types.ModuleType(spec.name)
+        module.__getattr__ = lambda name: _stub_attribute(spec.name, name)
+        return module
+
+    def exec_module(self, module):
+        pass
+
+def _stub_attribute(module, name):
+    if name.startswith('__'):
+        raise AttributeError(name)
+    return type(name, (Exception,), {{'__module__': module}})
+
+sys.meta_path.append(StubFinder())
+"""
+
+
+def traced_peak(func) -> str:
+    """
+    Peak of memory allocated by func, traced by tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return f'{peak / 1024:.1f} KiB'
+
+
+def bench_startup(root: Path, repeat: int) -> dict:
+    """
+    Cold start of a single KKTV url: import services and load the service class matched by the url
+    """
+    code = STUB_CODE + """
+import importlib
+import services
+service = next(service for service in services.service_map if service['domain'] == 'kktv.me')
+if isinstance(service['class'], str):
+    module_name, class_name = service['class'].rsplit('.', 1)
+    getattr(importlib.import_module(module_name), class_name)
+print(len(sys.modules), ','.join(sorted(stubbed)) or '-')
+"""
+    rss, output = peak_rss(root, '-c', code)
+    modules, stubbed = output.split()
+    return {
+        f'kktv url (stubbed: {stubbed})': best_of(lambda: run_python(root, code), repeat),
+        'kktv url, peak RSS': rss,
+        'kktv url, loaded modules': modules,
+    }
+
+
+def make_subtitle(texts: list, count: int, duration: int = 1000):
+    """
+    Subtitle of count back-to-back events cycling through texts
+    """
+    import pysubs2
+
+    subs = pysubs2.SSAFile()
+    for i in range(count):
+        subs.append(pysubs2.SSAEvent(start=i * duration, end=(i + 1) * duration,
+                                     text=texts[i % len(texts)]))
+    return subs
+
+
+def bench_merge(root: Path, repeat: int) -> dict:
+    """
+    Merge repeated subtitles, as split by fragmented downloads
+    """
+    from utils.subtitle import merge_same_subtitle
+
+    results = {}
+    for count in (2000, 20000, 100000):
+        def setup():
+            # runs of three identical cues, with an empty cue after every ten runs
+            return make_subtitle([text for i in range(10) for text in [f'line {i}'] * 3] + [''], count)
+        results[f'{count} events'] = best_of(merge_same_subtitle, repeat, setup)
+    return results
+
+
+def bench_format(root: Path, repeat: int) -> dict:
+    """
+    Normalise the text of Chinese and English subtitles
+    """
+    from utils.subtitle import clean_subs, format_subtitle, format_zh_subtitle
+
+    texts = ['{\\i1}(笑聲){\\i0} 你好嗎? 我很好...',
+             '- 走吧,快點!　　- 等等我:',
+             'Hello&amp;goodbye&rlm;​\xa0there',
+             '{\\b1}Where are you going?{\\b0}\\N- Home.']
+
+    def setup():
+        return make_subtitle(texts, 20000)
+
+    def separate(subs):
+        format_subtitle(format_zh_subtitle(clean_subs(subs)))
+
+    results = {'clean, zh, format': best_of(separate, repeat, setup)}
+    if 'zh_subtitle' in inspect.signature(format_subtitle).parameters:
+        results['clean, format zh'] = best_of(
+            lambda subs: format_subtitle(clean_subs(subs), zh_subtitle=True), repeat, setup)
+    return results
+
+
+def bench_decode(root: Path, repeat: int) -> dict:
+    """
+    Detect encodings of a mixed corpus: 20 episodes from each of 3 platforms serving utf-8, Big5 and GBK
+    """
+    import utils.subtitle
+    from utils.subtitle import get_encoding_type
+
+    corpus = {
+        'utf-8': '你好嗎？我很好，謝謝。',
+        'big5': '你好嗎？我很好，謝謝。',
+        'gbk': '你好吗？我很好，谢谢。',
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        files = []
+        for encoding, text in corpus.items():
+            srt = ''.join(f'{i}\n00:00:{i % 60:02},000 --> 00:00:{i % 60:02},500\n{text}\n\n'
+                          for i in range(1, 3000))
+            for episode in range(1, 21):
+                file_path = Path(folder, encoding, f'S01E{episode:02}.srt')
+                file_path.parent.mkdir(exist_ok=True)
+                file_path.write_bytes(srt.encode(encoding))
+                files.append((str(file_path), encoding))
+
+        results = {f'{len(files)} files, get_encoding_type': best_of(
+            lambda: [get_encoding_type(file_path) for file_path, _ in files], repeat)}
+        if hasattr(utils.subtitle, 'get_encoding_key'):
+            from utils.subtitle import detect_encoding, encoding_cache, get_encoding_key
+
+            def detect(_):
+                for file_path, platform in files:
+                    detect_encoding(Path(file_path).read_bytes(), get_encoding_key(file_path, platform))
+            results[f'{len(files)} files, cached by platform'] = best_of(
+                detect, repeat, encoding_cache.clear)
+        return results
+
+
+def mp4_box(name: str, payload: bytes = b'', version: int = None, flags: int = 0) -> bytes:
+    """
+    Mp4 box (full box when version is given)
+    """
+    if version is not None:
+        payload = struct.pack('>I', version << 24 | flags) + payload
+    return struct.pack('>I4s', len(payload) + 8, name.encode()) + payload
+
+
+def make_wvtt(cues: int, duration: int = 1000, timescale: int = 1000, start: int = 0) -> tuple:
+    """
+    Init segment and one media segment of a wvtt track, starting at start (in timescale)
+    """
+    stsd = mp4_box('stsd', struct.pack('>I', 1) + mp4_box('wvtt', bytes(8)), 0)
+    mdhd = mp4_box('mdhd', struct.pack('>IIII', 0, 0, timescale, 0) + bytes(4), 0)
+    init = mp4_box('moov', mp4_box('trak', mp4_box(
+        'mdia', mdhd + mp4_box('minf', mp4_box('stbl', stsd)))))
+
+    samples = [mp4_box('vttc', mp4_box('payl', f'第{i}句 line {i}\nsecond line'.encode()))
+               for i in range(cues)]
+    trun = struct.pack('>I', cues) + b''.join(struct.pack('>II', duration, len(sample))
+                                              for sample in samples)
+    traf = (mp4_box('tfhd', struct.pack('>I', 1), 0) +
+            mp4_box('tfdt', struct.pack('>Q', start), 1) +
+            mp4_box('trun', trun, 0, 0x300))
+    segment = mp4_box('moof', mp4_box('traf', traf)) + mp4_box('mdat', b''.join(samples))
+    return init, segment
+
+
+def bench_wvtt(root: Path, repeat: int) -> dict:
+    """
+    Parse wvtt segments of a DASH subtitle track (200 segments of 50 cues)
+    """
+    from tools.pyshaka.text.Mp4VttParser import Mp4VttParser
+    from tools.pyshaka.util.DataViewReader import DataViewReader, Endianness
+    from tools.pyshaka.util.TextParser import TimeContext
+
+    init, segment = make_wvtt(50)
+    time_context = TimeContext(periodStart=0, segmentStart=0, segmentEnd=0)
+
+    def parse():
+        parser = Mp4VttParser()
+        parser.parseInit(init)
+        for _ in range(200):
+            parser.parseMedia(segment, time_context)
+
+    def read(data):
+        reader = DataViewReader(data, Endianness.BIG_ENDIAN)
+        while reader.hasMoreData():
+            reader.readUint32()
+
+    def parse_large():
+        parser = Mp4VttParser()
+        parser.parseInit(init)
+        parser.parseMedia(large_segment, time_context)
+
+    _, large_segment = make_wvtt(10000)
+    megabyte = bytes(1024 * 1024)
+    return {
+        '10000 cues': best_of(parse, repeat),
+        'read uint32 of 1 MiB': best_of(read, repeat, lambda: bytes(1024 * 1024)),
+        '10000 cues, traced peak': traced_peak(parse),
+        'read uint32 of 1 MiB, traced peak': traced_peak(lambda: read(megabyte)),
+        f'1 segment of {len(large_segment) // 1024} KiB, traced peak': traced_peak(parse_large),
+    }
+
+
+def bench_track(root: Path, repeat: int) -> dict:
+    """
+    Peak RSS of pyshaka.main.parse over a 4-hour wvtt track (7200 segments of 2s with 4 cues)
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        segments_path = Path(folder, 'segments')
+        segments_path.mkdir()
+        for index in range(7200):
+            init, segment = make_wvtt(4, 500, start=index * 2000)
+            Path(segments_path, f'segment_{index}.mp4').write_bytes(segment)
+        Path(segments_path, 'init.mp4').write_bytes(init)
+
+        command = ['-m', 'tools.pyshaka.main', '--type', 'wvtt',
+                   '--init-path', str(segments_path / 'init.mp4'), '--segments-path', str(segments_path)]
+        results = {'28800 cues': peak_rss(root, *command)[0]}
+        try:
+            results['28800 cues, --stream'] = peak_rss(root, *command, '--stream')[0]
+        except subprocess.CalledProcessError:
+            results['28800 cues, --stream'] = 'not supported'
+        return results
+
+
+def make_ttml(cues: int, styles: int = 20, regions: int = 4) -> bytes:
+    """
+    TTML document of cues referencing styles and regions
+    """
+    head = ''.join(f'<style xml:id="s{i}" tts:color="white" tts:fontSize="{100 + i}%"/>'
+                   for i in range(styles))
+    head += '<layout>' + ''.join(f'<region xml:id="r{i}" tts:origin="10% {10 + i * 20}%" tts:extent="80% 20%"/>'
+                                 for i in range(regions)) + '</layout>'
+    body = ''.join(f'<p begin="{i}.000s" end="{i}.500s" style="s{i % styles}" region="r{i % regions}">'
+                   f'第{i}句<br/><span tts:fontStyle="italic">line {i}</span></p>'
+                   for i in range(cues))
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<tt xmlns="http://www.w3.org/ns/ttml" xmlns:tts="http://www.w3.org/ns/ttml#styling">'
+            f'<head><styling>{head}</styling></head><body><div>{body}</div></body></tt>').encode()
+
+
+def bench_ttml(root: Path, repeat: int) -> dict:
+    """
+    Parse a TTML subtitle document
+    """
+    from tools.pyshaka.text.TtmlTextParser import TtmlTextParser
+    from tools.pyshaka.util.TextParser import TimeContext
+
+    data = make_ttml(3000)
+    time_context = TimeContext(periodStart=0, segmentStart=0, segmentEnd=0)
+    return {'3000 cues': best_of(lambda: TtmlTextParser().parseMedia(data, time_context), repeat)}
+
+
+BENCHMARKS = {
+    'startup': bench_startup,
+    'merge': bench_merge,
+    'format': bench_format,
+    'decode': bench_decode,
+    'wvtt': bench_wvtt,
+    'track': bench_track,
+    'ttml': bench_ttml,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Time hot paths of Subtitle-Downloader')
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"benchmarks to run ({', '.join(BENCHMARKS)}), default is all")
+    parser.add_argument('--root', default=str(ROOT),
+                        help='source tree to time, default is this checkout')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='runs of each benchmark, the best one is reported')
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    root = Path(args.root).resolve()
+    sys.path.insert(0, str(root))
+    os.chdir(root)
+    print(root)
+    for name in args.benchmarks or BENCHMARKS:
+        try:
+            results = BENCHMARKS[name](root, args.repeat)
+        except Exception as error:
+            print(f'{name}: failed ({error!r})')
+            continue
+        for label, value in results.items():
+            # wall times are in seconds, other measures are formatted by their benchmark
+            print(f"{name}: {label}: {f'{value * 1000:.1f} ms' if isinstance(value, float) else value}")
+
+
+if __name__ == '__main__':
+    main()
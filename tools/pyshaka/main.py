@@ -1,6 +1,11 @@
-from typing import List
+import re
+import mmap
+import heapq
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple
 from pathlib import Path
-from datetime import datetime
 from argparse import ArgumentParser
 
 from tools.pyshaka.util.TextParser import TimeContext
@@ -18,6 +23,11 @@ class CmdArgs:
         self.init_path = None  # type: str
         self.segments_path = None  # type: str
         self.segment_time = None  # type: float
+        self.stream = None  # type: bool
+        self.window = None  # type: int
+        self.workers = None  # type: int
+        self.format = None  # type: str
+        self.output_path = None  # type: str
 
 
 def command_handler(args: CmdArgs):
@@ -30,6 +40,8 @@ def command_handler(args: CmdArgs):
         args.init_path = args.init_path.strip()
     args.segments_path = args.segments_path.strip()
     args.segment_time = float(args.segment_time)
+    args.window = int(args.window)
+    args.workers = int(args.workers)
 
 
 def loop_nestedCues(lines: List[str], nestedCues: List[Cue], index: int, segment_time: float):
@@ -65,8 +77,15 @@ def compare(cue: Cue):
 #     return 0
 
 
-def gentm(tm: float):
-    return datetime.utcfromtimestamp(tm).strftime('%H:%M:%S.%f')[:-3]
+def toMilliseconds(tm: float) -> int:
+    # 和原来的datetime.utcfromtimestamp一样 先四舍五入到微秒再截断到毫秒
+    return max(round(tm * 1000000), 0) // 1000
+
+
+def gentm(tm: float, separator: str = '.'):
+    # 整数运算 不再经过datetime.strftime 超过24小时也不会回绕
+    ms = toMilliseconds(tm)
+    return f'{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}{separator}{ms % 1000:03d}'
 
 
 def test_parse_mp4vtt():
@@ -79,7 +98,7 @@ def test_parse_mp4vtt():
     mp4vttparser.parseMedia(vttSegment, timecontext)
 
 
-def parse(args: CmdArgs):
+def create_parser(args: CmdArgs):
     if args.type == 'wvtt':
         parser = Mp4VttParser()
     elif args.type == 'ttml':
@@ -91,12 +110,22 @@ def parse(args: CmdArgs):
         parser.parseInit(init_path.read_bytes())
     else:
         parser.set_timescale(args.timescale)
-    segments_path = Path(args.segments_path)
-    time = TimeContext(
-        **{'periodStart': 0, 'segmentStart': 0, 'segmentEnd': 0})
-    index = 0
-    cues = []
-    for segment_path in segments_path.iterdir():
+    return parser
+
+
+def segment_index(segment_path: Path):
+    # 按文件名中最后一组数字排序 没有数字的排在最前
+    digits = re.findall(r'\d+', segment_path.stem)
+    return (int(digits[-1]) if digits else -1, segment_path.name)
+
+
+def get_segment_paths(args: CmdArgs) -> List[Path]:
+    '''
+    iterdir的顺序是不确定的 这里按分段序号排好
+    '''
+    init_name = Path(args.init_path).name if args.init_path else None
+    segment_paths = []
+    for segment_path in Path(args.segments_path).iterdir():
         if segment_path.is_dir():
             if args.debug:
                 log.debug(f'{segment_path} is not a file, skip it')
@@ -106,70 +135,310 @@ def parse(args: CmdArgs):
                 log.debug(
                     f"{segment_path} suffix is not in ['.mp4', '.m4s', '.dash', '.ts'], skip it")
             continue
-        if args.init_path and segment_path.name == init_path.name:
+        if init_name and segment_path.name == init_name:
             if args.debug:
                 log.debug(f"{segment_path} is init_path , skip it")
             continue
+        segment_paths.append(segment_path)
+    return sorted(segment_paths, key=segment_index)
+
+
+def parse_segment(parser, segment_path: Path, time: TimeContext) -> List[Cue]:
+    '''
+    用mmap读取分段 不把整个文件读进内存
+    '''
+    if segment_path.stat().st_size == 0:
+        return []
+    with open(segment_path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return parser.parseMedia(data, time)
+    finally:
+        try:
+            data.close()
+        except BufferError:
+            # 还有视图引用着mmap(比如异常的traceback) 交给gc释放
+            pass
+
+
+def collect_cues(lines: List[Cue], _cues: List[Cue], segment_path: Path, index: int, segment_time: float):
+    for cue in _cues:
+        cue.file = segment_path.name
+        if len(cue.nestedCues) > 0:
+            loop_nestedCues(lines, cue.nestedCues, index, segment_time)
+        if cue.payload != '':
+            cue.startTime += segment_time * index
+            cue.endTime += segment_time * index
+            lines.append(cue)
+
+
+def format_cue(cue: Cue, subtitle_format: str = '.vtt', index: int = 0) -> str:
+    if subtitle_format == '.srt':
+        return f'{index}\n{gentm(cue.startTime, ",")} --> {gentm(cue.endTime, ",")}\n{cue.payload}'
+    settings = cue._settings
+    if settings:
+        settings = ' ' + settings
+        return f'{gentm(cue.startTime)} --> {gentm(cue.endTime)}{settings}\n{cue.payload}'
+    else:
+        return f'{gentm(cue.startTime)} --> {gentm(cue.endTime)}\n{cue.payload}'
+
+
+class CueReducer:
+    '''
+    增量排序去重
+    只有最近window个分段的cue会留在内存里 更早的cue按startTime排好 去重后依次产出
+    '''
+
+    def __init__(self, window: int):
+        self.window = max(window, 1)
+        self.heap = []  # type: List[Tuple[float, int, Cue]]
+        self.count = 0  # type: int
+        # 最近window个分段中各自最小的startTime
+        self.starts = deque(maxlen=self.window)  # type: Deque[float]
+        self.cue = None  # type: Cue
+
+    def add(self, cues: List[Cue]) -> Iterator[Cue]:
+        if not cues:
+            return
+        for cue in cues:
+            # count保证startTime相同时保持原来的顺序
+            heapq.heappush(self.heap, (cue.startTime, self.count, cue))
+            self.count += 1
+        self.starts.append(min(cue.startTime for cue in cues))
+        if len(self.starts) < self.window:
+            return
+        # 认为之后的分段不会出现比窗口内更早的cue
+        watermark = min(self.starts)
+        while self.heap and self.heap[0][0] < watermark:
+            yield from self.reduce(heapq.heappop(self.heap)[2])
+
+    def merge(self, cues: Iterable[Cue]) -> Iterator[Cue]:
+        '''
+        已经按startTime排好序的cue 直接去重
+        '''
+        for cue in cues:
+            yield from self.reduce(cue)
+
+    def reduce(self, next_cue: Cue) -> Iterator[Cue]:
+        # 去重
+        # 1. 如果当前行的endTime等于下一行的startTime 并且下一行内容与当前行相同 取下一行的endTime作为当前行的endTime 然后去除下一行
+        # 2. 否则将下一行作为当前行 再次进行比较 直到比较结束
+        if self.cue is None or self.cue.payload == '':
+            self.cue = next_cue
+        elif self.cue.payload == next_cue.payload and self.cue.endTime == next_cue.startTime:
+            self.cue.endTime = next_cue.endTime
+        else:
+            yield self.cue
+            self.cue = next_cue
+
+    def close(self) -> Iterator[Cue]:
+        while self.heap:
+            yield from self.reduce(heapq.heappop(self.heap)[2])
+        # 最后一行也不能掉
+        if self.cue is not None:
+            yield self.cue
+            self.cue = None
+
+
+class CompactCue:
+    '''
+    多进程解析时用的精简cue 只保留写文件需要的字段
+    '''
+    __slots__ = ('startTime', 'endTime', 'payload', '_settings')
+
+    def __init__(self, startTime: float, endTime: float, payload: str, _settings: str):
+        self.startTime = startTime
+        self.endTime = endTime
+        self.payload = payload
+        self._settings = _settings
+
+
+# 子进程中按(type, timescale)缓存的解析器
+worker_parsers = {}  # type: Dict[Tuple[str, int], object]
+
+
+def parse_segment_worker(job: Tuple[str, int, str, int, float]) -> List[Tuple[float, float, str, str]]:
+    '''
+    在子进程中解析一个分段 返回按startTime排好序的cue元组
+    '''
+    _type, timescale, segment_path, index, segment_time = job
+    parser = worker_parsers.get((_type, timescale))
+    if parser is None:
+        parser = Mp4VttParser() if _type == 'wvtt' else Mp4TtmlParser()
+        parser.set_timescale(timescale)
+        worker_parsers[(_type, timescale)] = parser
+    time = TimeContext(
+        **{'periodStart': 0, 'segmentStart': 0, 'segmentEnd': 0})
+    segment_path = Path(segment_path)
+    return compact_cues(parse_segment(parser, segment_path, time), segment_path, index, segment_time)
+
+
+def compact_cues(_cues: List[Cue], segment_path: Path, index: int, segment_time: float) -> List[Tuple[float, float, str, str]]:
+    '''
+    一个分段的cue 按startTime排好序并转成元组
+    '''
+    cues = []  # type: List[Cue]
+    collect_cues(cues, _cues, segment_path, index, segment_time)
+    cues.sort(key=compare)
+    return [(cue.startTime, cue.endTime, cue.payload, cue._settings) for cue in cues]
+
+
+def merge_compact_cues(results: List[List[Tuple[float, float, str, str]]], window: int = 1) -> Iterator[Cue]:
+    '''
+    各分段的cue元组按startTime做k路归并 再去重
+    '''
+    reducer = CueReducer(window)
+    # heapq.merge对startTime相同的cue保持分段顺序 和稳定排序一致
+    yield from reducer.merge(CompactCue(*cue)
+                             for cue in heapq.merge(*results, key=itemgetter(0)))
+    yield from reducer.close()
+
+
+def iter_cues_parallel(args: CmdArgs) -> Iterator[Cue]:
+    '''
+    多进程解析 每个分段在子进程中独立解析
+    各分段的结果按startTime做k路归并 再去重
+    '''
+    parser = create_parser(args)
+    timescale = getattr(parser, 'timescale_', None) or args.timescale
+    jobs = [(args.type, timescale, str(segment_path), index, args.segment_time)
+            for index, segment_path in enumerate(get_segment_paths(args))]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(parse_segment_worker, jobs,
+                                    chunksize=max(len(jobs) // (args.workers * 4), 1)))
+    if args.debug:
+        log.debug(f'cues count {sum(len(result) for result in results)}')
+    yield from merge_compact_cues(results, args.window)
+
+
+class SegmentConsumer:
+    '''
+    不落盘 直接接收下载好的分段数据 按分段序号保存解析出的cue
+    init分段(序号-1)到达之前的分段先暂存 拿到timescale后再解析
+    '''
+
+    def __init__(self, args: CmdArgs, has_init: bool = True):
+        self.args = args
+        self.parser = Mp4VttParser() if args.type == 'wvtt' else Mp4TtmlParser()
+        self.time = TimeContext(
+            **{'periodStart': 0, 'segmentStart': 0, 'segmentEnd': 0})
+        self.ready = not has_init  # type: bool
+        if self.ready:
+            self.parser.set_timescale(args.timescale)
+        self.pending = {}  # type: Dict[int, bytes]
+        self.cues = {}  # type: Dict[int, List[Tuple[float, float, str, str]]]
+
+    def add(self, index: int, data: bytes):
+        if index == -1:
+            self.parser.parseInit(data)
+            self.ready = True
+            for _index in sorted(self.pending):
+                self.parse_(_index, self.pending.pop(_index))
+        elif self.ready:
+            self.parse_(index, data)
+        else:
+            self.pending[index] = data
+
+    def parse_(self, index: int, data: bytes):
+        if self.args.debug:
+            log.debug(f'start parseMedia for segment {index}')
+        if len(data) == 0:
+            self.cues[index] = []
+            return
+        self.cues[index] = compact_cues(self.parser.parseMedia(data, self.time), Path(f'{index:0>4}'), 0, 0)
+
+    def iter_cues(self) -> Iterator[Cue]:
+        '''
+        和读取分段文件时一样 按分段序号排序 segment_time按排序后的位置计算偏移
+        '''
+        results = []
+        for position, index in enumerate(sorted(self.cues)):
+            shift = self.args.segment_time * position
+            if shift:
+                results.append([(start + shift, end + shift, payload, settings)
+                                for start, end, payload, settings in self.cues[index]])
+            else:
+                results.append(self.cues[index])
+        return merge_compact_cues(results)
+
+
+def iter_cues_stream(args: CmdArgs) -> Iterator[Cue]:
+    '''
+    流式解析 适合很长的直播录制
+    分段逐个mmap解析 cue交给CueReducer增量排序去重
+    '''
+    parser = create_parser(args)
+    time = TimeContext(
+        **{'periodStart': 0, 'segmentStart': 0, 'segmentEnd': 0})
+    reducer = CueReducer(args.window)
+    for index, segment_path in enumerate(get_segment_paths(args)):
         if args.debug:
             log.debug(f'start parseMedia for {segment_path}')
-        _cues = parser.parseMedia(segment_path.read_bytes(), time)
+        cues = []  # type: List[Cue]
+        collect_cues(cues, parse_segment(parser, segment_path, time),
+                     segment_path, index, args.segment_time)
+        yield from reducer.add(cues)
+    yield from reducer.close()
 
-        for cue in _cues:
-            cue.file = segment_path.name
-            if len(cue.nestedCues) > 0:
-                loop_nestedCues(cues, cue.nestedCues, index, args.segment_time)
-            if cue.payload != '':
-                cue.startTime += args.segment_time * index
-                cue.endTime += args.segment_time * index
-                cues.append(cue)
-        index += 1
+
+def iter_cues_memory(args: CmdArgs) -> Iterator[Cue]:
+    parser = create_parser(args)
+    time = TimeContext(
+        **{'periodStart': 0, 'segmentStart': 0, 'segmentEnd': 0})
+    cues = []
+    for index, segment_path in enumerate(get_segment_paths(args)):
+        if args.debug:
+            log.debug(f'start parseMedia for {segment_path}')
+        _cues = parser.parseMedia(segment_path.read_bytes(), time)
+        collect_cues(cues, _cues, segment_path, index, args.segment_time)
     # 按Cue.startTime从小到大排序
     cues.sort(key=compare)
     if args.debug:
         log.debug(f'cues count {len(cues)}')
-    assert len(cues) > 0, 'ohh, it is a bug...'
-    # 去重
-    # 1. 如果当前行的endTime等于下一行的startTime 并且下一行内容与当前行相同 取下一行的endTime作为当前行的endTime 然后去除下一行
-    # 2. 否则将下一行作为当前行 再次进行比较 直到比较结束
-    offset = 0
-    cues_fix = []  # type: List[Cue]
-    cue = cues[offset]
-    while offset < len(cues) - 1:
-        offset += 1
-        # 跳过空的行
-        next_cue = cues[offset]
-        if cue.payload == '':
-            cue = next_cue
-            continue
-        if cue.payload == next_cue.payload and cue.endTime == next_cue.startTime:
-            cue.endTime = next_cue.endTime
-        else:
-            cues_fix.append(cue)
-            cue = next_cue
-    # 最后一行也不能掉
-    next_cue = cues[offset]
-    if cue.payload == next_cue.payload and cue.endTime == next_cue.startTime:
-        cue.endTime = next_cue.endTime
-    else:
-        cues_fix.append(cue)
-        cue = next_cue
+    reducer = CueReducer(1)
+    yield from reducer.merge(cues)
+    yield from reducer.close()
+
+
+def iter_cues(args: CmdArgs) -> Iterator[Cue]:
+    '''
+    按startTime排好序并去重后的cue
+    '''
+    if (getattr(args, 'workers', 0) or 0) > 1:
+        return iter_cues_parallel(args)
+    if getattr(args, 'stream', False):
+        return iter_cues_stream(args)
+    return iter_cues_memory(args)
+
+
+def write_cues(cues: Iterable[Cue], output_path: Path, subtitle_format: str = '.vtt') -> int:
+    '''
+    直接写成.vtt或.srt 返回写入的行数
+    '''
+    lines = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if subtitle_format == '.vtt':
+            f.write('WEBVTT')
+        for cue in cues:
+            lines += 1
+            if subtitle_format == '.vtt':
+                f.write('\n\n' + format_cue(cue))
+            else:
+                f.write(format_cue(cue, subtitle_format, lines) + '\n\n')
+    return lines
+
+
+def parse(args: CmdArgs):
+    subtitle_format = getattr(args, 'format', None) or '.vtt'
+    output_path = Path(getattr(args, 'output_path', None) or
+                       Path(args.segments_path).with_suffix(subtitle_format))
+    lines = write_cues(iter_cues(args), output_path, subtitle_format)
+    assert lines > 0, 'ohh, it is a bug...'
     if args.debug:
         log.debug(
-            f'after reduce duplicated lines, now lines count is {len(cues_fix)}')
-    # 先用列表放内容 最后join
-    contents = ["WEBVTT"]  # type: List[str]
-    for cue in cues_fix:
-        settings = cue._settings
-        if settings:
-            settings = ' ' + settings
-            text = f'{gentm(cue.startTime)} --> {gentm(cue.endTime)}{settings}\n{cue.payload}'
-        else:
-            text = f'{gentm(cue.startTime)} --> {gentm(cue.endTime)}\n{cue.payload}'
-        contents.append(text)
-    content = '\n\n'.join(contents)
-    segments_path.with_suffix(".vtt").write_text(content, encoding='utf-8')
-    log.info(f'{len(cues_fix)} lines of subtitle was founded.')
-    log.info(f'write to {segments_path.with_suffix(".vtt").resolve()}')
+            f'after reduce duplicated lines, now lines count is {lines}')
+    log.info(f'{lines} lines of subtitle was founded.')
+    log.info(f'write to {output_path.resolve()}')
 
 
 def main():
@@ -191,6 +460,16 @@ def main():
                         help='segments folder path')
     parser.add_argument('-segment-time', '--segment-time', default='0',
                         help='single segment duration, usually needed for ttml content, calculation method: d / timescale')
+    parser.add_argument('-stream', '--stream', action='store_true',
+                        help='mmap segments and write sorted cues incrementally, for very long recordings')
+    parser.add_argument('-window', '--window', default='4',
+                        help='segments kept in memory for sorting when --stream')
+    parser.add_argument('-workers', '--workers', default='0',
+                        help='parse segments with a process pool of this size when greater than 1')
+    parser.add_argument('-format', '--format', choices=['.vtt', '.srt'], default='.vtt',
+                        help='output subtitle format')
+    parser.add_argument('-output-path', '--output-path',
+                        help='output file path, default is segments folder path with format suffix')
     args = parser.parse_args()  # type: CmdArgs
     command_handler(args)
     parse(args)
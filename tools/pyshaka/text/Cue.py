@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Any, Callable, Dict, List
 
 
 class positionAlign(Enum):
@@ -84,76 +85,66 @@ class textDecoration(Enum):
 
 
 class Cue:
+    '''
+    shaka/text/cue.js
+    长字幕会有几十万个Cue 所以用了__slots__
+    样式字段大多是默认值 只有设置过的才会存到styles_里 没有设置过的读取时返回默认值
+    '''
+
+    __slots__ = ('startTime', 'endTime', 'payload', 'nestedCues', 'id',
+                 'lineBreak', 'file', '_settings', 'styles_')
 
     def __init__(self, startTime: float, endTime: float, payload: str, _settings: str = ''):
         self.startTime = startTime
-        self.direction = direction.HORIZONTAL_LEFT_TO_RIGHT
         self.endTime = endTime
         self.payload = payload
-        self.region = CueRegion()
-        self.position = None
-        self.positionAlign = positionAlign.AUTO
-        self.size = 0
-        self.textAlign = textAlign.CENTER
-        self.writingMode = writingMode.HORIZONTAL_TOP_TO_BOTTOM
-        self.lineInterpretation = lineInterpretation.LINE_NUMBER
-        self.line = None
-        self.lineHeight = ''
-        self.lineAlign = lineAlign.START
-        self.displayAlign = displayAlign.AFTER
-        self.color = ''
-        self.backgroundColor = ''
-        self.backgroundImage = ''
-        self.border = ''
-        self.fontSize = ''
-        self.fontWeight = fontWeight.NORMAL
-        self.fontStyle = fontStyle.NORMAL
-        self.fontFamily = ''
-        self.letterSpacing = ''
-        self.linePadding = ''
-        self.opacity = 1
-        self.textDecoration = []
-        self.wrapLine = True
-        self.id = ''
         self.nestedCues = []
+        self.id = ''
         self.lineBreak = False
-        self.spacer = False
-        self.cellResolution = {'columns': 32, 'rows': 15}
+        self.file = ''
         self._settings = _settings
+        self.styles_ = None  # type: Dict[str, Any]
 
     @staticmethod
-    def lineBreak(start: float, end: float) -> 'Cue':
+    def createLineBreak(start: float, end: float) -> 'Cue':
+        # js中叫lineBreak 和实例属性lineBreak重名 这里改个名字
         cue = Cue(start, end, '')
         cue.lineBreak = True
         return cue
 
+    @staticmethod
+    def fields() -> List[str]:
+        return [name for name in Cue.__slots__ if name != 'styles_'] + list(STYLE_DEFAULTS_)
+
     def clone(self):
-        cue = Cue(0, 0, '')
-        for k, v in self.__dict__.items():
-            if isinstance(v, list):
-                v = v.copy()
-            cue.__setattr__(k, v)
+        cue = Cue(self.startTime, self.endTime, self.payload, self._settings)
+        cue.nestedCues = self.nestedCues.copy()
+        cue.id = self.id
+        cue.lineBreak = self.lineBreak
+        cue.file = self.file
+        if self.styles_:
+            cue.styles_ = {k: v.copy() if isinstance(v, list) else v for k, v in self.styles_.items()}
         return cue
 
     @staticmethod
     def equal(cue1: 'Cue', cue2: 'Cue') -> bool:
         if cue1.startTime != cue2.startTime or cue1.endTime != cue2.endTime or cue1.payload != cue2.payload:
             return False
-        for k, v in cue1.__dict__.items():
+        for k in Cue.fields():
             if k == 'startTime' or k == 'endTime' or k == 'payload':
                 pass
             elif k == 'nestedCues':
                 if not Cue.equal(cue1.nestedCues, cue2.nestedCues):
                     return False
             elif k == 'region' or k == 'cellResolution':
-                for k2 in cue1.__getattribute__(k):
-                    if cue1.__getattribute__(k)[k2] != cue2.__getattribute__(k)[k2]:
+                for k2 in getattr(cue1, k):
+                    if getattr(cue1, k)[k2] != getattr(cue2, k)[k2]:
                         return False
-            elif isinstance(cue1.__getattribute__(k), list):
-                if cue1.__getattribute__(k) != cue2.__getattribute__(k):
+            elif isinstance(getattr(cue1, k), list):
+                if getattr(cue1, k) != getattr(cue2, k):
                     return False
             else:
-                if cue1.__getattribute__(k) != cue1.__getattribute__(k):
+                if getattr(cue1, k) != getattr(cue1, k):
                     return False
         return True
 
@@ -182,4 +173,60 @@ class CueRegion:
         self.heightUnits = units.PERCENTAGE
         self.widthUnits = units.PERCENTAGE
         self.viewportAnchorUnits = units.PERCENTAGE
-        self.scroll = scrollMode.NONE
\ No newline at end of file
+        self.scroll = scrollMode.NONE
+
+
+# 样式字段的默认值 (默认值, 可变默认值的工厂函数)
+STYLE_DEFAULTS_ = {
+    'direction': (direction.HORIZONTAL_LEFT_TO_RIGHT, None),
+    'region': (None, CueRegion),
+    'position': (None, None),
+    'positionAlign': (positionAlign.AUTO, None),
+    'size': (0, None),
+    'textAlign': (textAlign.CENTER, None),
+    'writingMode': (writingMode.HORIZONTAL_TOP_TO_BOTTOM, None),
+    'lineInterpretation': (lineInterpretation.LINE_NUMBER, None),
+    'line': (None, None),
+    'lineHeight': ('', None),
+    'lineAlign': (lineAlign.START, None),
+    'displayAlign': (displayAlign.AFTER, None),
+    'color': ('', None),
+    'backgroundColor': ('', None),
+    'backgroundImage': ('', None),
+    'border': ('', None),
+    'fontSize': ('', None),
+    'fontWeight': (fontWeight.NORMAL, None),
+    'fontStyle': (fontStyle.NORMAL, None),
+    'fontFamily': ('', None),
+    'letterSpacing': ('', None),
+    'linePadding': ('', None),
+    'opacity': (1, None),
+    'textDecoration': (None, list),
+    'wrapLine': (True, None),
+    'spacer': (False, None),
+    'cellResolution': (None, lambda: {'columns': 32, 'rows': 15}),
+}
+
+
+def styleProperty_(name: str, default: Any, factory: Callable) -> property:
+
+    def getter(cue: Cue):
+        if cue.styles_ is not None and name in cue.styles_:
+            return cue.styles_[name]
+        if factory is None:
+            return default
+        # 可变的默认值(列表/字典/CueRegion)第一次读取时才创建 之后的修改要留在这个cue上
+        value = factory()
+        setter(cue, value)
+        return value
+
+    def setter(cue: Cue, value: Any):
+        if cue.styles_ is None:
+            cue.styles_ = {}
+        cue.styles_[name] = value
+
+    return property(getter, setter)
+
+
+for _name, (_default, _factory) in STYLE_DEFAULTS_.items():
+    setattr(Cue, _name, styleProperty_(_name, _default, _factory))
@@ -83,7 +83,7 @@ class Mp4VttParser:
                 box.reader, box.version, box.flags)
             presentations = parsedTRUNBox.sampleData
 
-        def mdat_callback(data: bytes):
+        def mdat_callback(data: memoryview):
             nonlocal sawMDAT
             nonlocal rawPayload
             assert not sawMDAT, 'VTT cues in mp4 with multiple MDAT are not currently supported'
@@ -95,7 +95,7 @@ class Mp4VttParser:
 
         baseTime = 0
         presentations = []  # type: List[ParsedTRUNSample]
-        rawPayload = b''  # type: bytes
+        rawPayload = b''  # type: memoryview
         cues = []  # type: List[Cue]
 
         sawTFDT = False
@@ -109,7 +109,7 @@ class Mp4VttParser:
         mp4parser = mp4parser.fullBox('tfdt', tfdt_callback)
         mp4parser = mp4parser.fullBox('tfhd', tfhd_callback)
         mp4parser = mp4parser.fullBox('trun', trun_callback)
-        mp4parser = mp4parser.box('mdat', Mp4Parser.allData(mdat_callback))
+        mp4parser = mp4parser.box('mdat', Mp4Parser.allData(mdat_callback, asView=True))
         mp4parser = mp4parser.parse(data, partialOkay=False)
 
         if not sawMDAT and not sawTFDT and not sawTRUN:
@@ -139,7 +139,7 @@ class Mp4VttParser:
                 payload = None
                 if payloadName == 'vttc':
                     if payloadSize > 8:
-                        payload = reader.readBytes(payloadSize - 8)
+                        payload = reader.readView(payloadSize - 8)
                 elif payloadName == 'vtte':
                     # It's a vtte, which is a vtt cue that is empty. Ignore any data that does exist.
                     reader.skip(payloadSize - 8)
@@ -172,7 +172,7 @@ class Mp4VttParser:
         return [cue for cue in cues if cue]
 
     @staticmethod
-    def parseVTTC_(data: bytes, startTime: float, endTime: float):
+    def parseVTTC_(data: memoryview, startTime: float, endTime: float):
 
         def payl_callback(data: bytes):
             nonlocal payload
@@ -1,17 +1,16 @@
 import re
-from xml.dom.minidom import parseString, Element, Node, Document
+from xml.parsers.expat import ExpatError
 from enum import Enum
-from typing import List, Union
+from typing import Dict, List
 
 from tools.pyshaka.text.Cue import Cue, CueRegion, units, direction, writingMode
 from tools.pyshaka.text.Cue import textAlign, lineAlign, positionAlign, displayAlign
 from tools.pyshaka.text.Cue import fontStyle, textDecoration
 from tools.pyshaka.util.TextParser import TimeContext
+from tools.pyshaka.util.TXml import TXml, TXmlNode
 from tools.pyshaka.util.exceptions import InvalidXML, InvalidTextCue
 from tools.pyshaka.log import log
 
-document = Document()
-
 
 class RateInfo_:
     def __init__(self, frameRate: str, subFrameRate: str, frameRateMultiplier: str, tickRate: str):
@@ -50,27 +49,30 @@ class TtmlTextParser:
     def parseMedia(self, data: bytes, time: TimeContext) -> List[Cue]:
         ttpNs = parameterNs_
         ttsNs = styleNs_
-        text = data.decode('utf-8')
         cues = []  # type: List[Cue]
         xml = None
 
-        if text == '':
+        if len(data) == 0:
             return cues
         try:
-            xml = parseString(text)
-        except Exception as e:
+            # expat一次遍历构建轻量节点树 代替minidom
+            xml = TXml.parseXmlString(data)
+        except ExpatError as e:
             log.error('xml parseString', exc_info=e)
         if xml is None:
             return cues
         parsererrors = xml.getElementsByTagName(
-            'parsererror')  # type: List[Element]
+            'parsererror')  # type: List[TXmlNode]
         if len(parsererrors) > 0 and parsererrors[0]:
             raise InvalidXML('ttml parsererror')
-        tts = xml.getElementsByTagName('tt')  # type: List[Element]
+        tts = xml.getElementsByTagName('tt')  # type: List[TXmlNode]
         if len(tts) == 0:
             raise InvalidXML('TTML does not contain <tt> tag.')
         tt = tts[0]
-        bodys = tt.getElementsByTagName('body')  # type: List[Element]
+        # tt是根节点时 直接用解析时建立的tagName索引
+        if tt.parentNode is not xml:
+            xml = tt
+        bodys = xml.getElementsByTagName('body')  # type: List[TXmlNode]
         if len(bodys) == 0:
             return []
         frameRate = tt.getAttributeNS(ttpNs, 'frameRate')
@@ -88,33 +90,36 @@ class TtmlTextParser:
                              frameRateMultiplier, tickRate)
         cellResolutionInfo = TtmlTextParser.getCellResolution_(cellResolution)
 
-        metadatas = tt.getElementsByTagName('metadata')  # type: List[Element]
+        metadatas = xml.getElementsByTagName('metadata')  # type: List[TXmlNode]
         metadataElements = []
         if len(metadatas) > 0:
             for childNode in metadatas[0].childNodes:
-                if isinstance(childNode, Element):
+                if childNode.nodeType == TXmlNode.ELEMENT_NODE:
                     metadataElements.append(childNode)
-        styles = tt.getElementsByTagName('style')  # type: List[Element]
-        regionElements = tt.getElementsByTagName(
-            'region')  # type: List[Element]
-        cueRegions = []
-
-        for region in regionElements:
+        # style/region/metadata 预先按xml:id建好字典 后面查找不用再遍历
+        metadataElements = TtmlTextParser.indexById_(metadataElements)
+        styles = TtmlTextParser.indexById_(
+            xml.getElementsByTagName('style'))  # type: Dict[str, TXmlNode]
+        regionElements = TtmlTextParser.indexById_(
+            xml.getElementsByTagName('region'))  # type: Dict[str, TXmlNode]
+        cueRegions = {}  # type: Dict[str, CueRegion]
+
+        for region in regionElements.values():
             cueRegion = TtmlTextParser.parseCueRegion_(region, styles, extent)
             if cueRegion:
-                cueRegions.append(cueRegion)
+                cueRegions.setdefault(cueRegion.id, cueRegion)
 
         body = bodys[0]
-        if len([childNode for childNode in body.childNodes if isinstance(childNode, Element) and childNode.tagName == 'p']) > 0:
+        if len([childNode for childNode in body.childNodes if childNode.nodeType == TXmlNode.ELEMENT_NODE and childNode.tagName == 'p']) > 0:
             raise InvalidTextCue('<p> can only be inside <div> in TTML')
         for divNode in body.childNodes:
-            if isinstance(divNode, Element) is False:
+            if divNode.nodeType != TXmlNode.ELEMENT_NODE:
                 continue
             if divNode.tagName != 'div':
                 continue
             has_p = False
             for pChildren in divNode.childNodes:
-                if isinstance(pChildren, Element) is False:
+                if pChildren.nodeType != TXmlNode.ELEMENT_NODE:
                     continue
                 if pChildren.tagName == 'span':
                     raise InvalidTextCue(
@@ -133,16 +138,26 @@ class TtmlTextParser:
         return cues
 
     @staticmethod
-    def parseCue_(cueNode: Union[Node, Element], offset, rateInfo, metadataElements, styles, regionElements, cueRegions, whitespaceTrim, isNested, cellResolution):
-        cueElement = None  # type: Element
-        parentElement = cueNode.parentNode  # type: Element
+    def indexById_(elements: List[TXmlNode]) -> Dict[str, TXmlNode]:
+        '''
+        按xml:id建立字典 id重复时和原来的线性查找一样取第一个
+        '''
+        index = {}  # type: Dict[str, TXmlNode]
+        for element in elements:
+            index.setdefault(element.getAttribute('xml:id'), element)
+        return index
 
-        if cueNode.nodeType == Node.TEXT_NODE:
-            span = document.createElement('span')  # tpye: Text
+    @staticmethod
+    def parseCue_(cueNode: TXmlNode, offset, rateInfo, metadataElements, styles, regionElements, cueRegions, whitespaceTrim, isNested, cellResolution):
+        cueElement = None  # type: TXmlNode
+        parentElement = cueNode.parentNode  # type: TXmlNode
+
+        if cueNode.nodeType == TXmlNode.TEXT_NODE:
+            span = TXmlNode(TXmlNode.ELEMENT_NODE, 'span')
             span.appendChild(cueNode)
             cueElement = span
         else:
-            assert cueNode.nodeType == Node.ELEMENT_NODE, 'nodeType should be ELEMENT_NODE!'
+            assert cueNode.nodeType == TXmlNode.ELEMENT_NODE, 'nodeType should be ELEMENT_NODE!'
             cueElement = cueNode
         assert cueElement, 'cueElement should be non-None!'
 
@@ -165,7 +180,7 @@ class TtmlTextParser:
             elif localWhitespaceTrim:
                 return None
         start, end = TtmlTextParser.parseTime_(cueElement, rateInfo)
-        while parentElement and parentElement.nodeType == Node.ELEMENT_NODE and parentElement.tagName != 'tt':
+        while parentElement and parentElement.nodeType == TXmlNode.ELEMENT_NODE and parentElement.tagName != 'tt':
             start, end = TtmlTextParser.resolveTime_(
                 parentElement, rateInfo, start, end)
             parentElement = parentElement.parentNode
@@ -184,7 +199,7 @@ class TtmlTextParser:
         nestedCues = []
         flag = True
         for childNode in cueElement.childNodes:
-            if childNode.nodeType != Node.TEXT_NODE:
+            if childNode.nodeType != TXmlNode.TEXT_NODE:
                 flag = False
                 break
         if flag:
@@ -220,7 +235,7 @@ class TtmlTextParser:
         if len(regionElements) > 0 and regionElements[0].getAttribute('xml:id'):
             regionElement = regionElements[0]
             regionId = regionElement.getAttribute('xml:id')
-            cue.region = [_ for _ in cueRegions if _.id == regionId][0]
+            cue.region = cueRegions[regionId]
         imageElement = None
         for nameSpace in smpteNsList_:
             imageElements = TtmlTextParser.getElementsFromCollection_(
@@ -268,7 +283,7 @@ class TtmlTextParser:
         return start, end
 
     @staticmethod
-    def parseTime_(element: Element, rateInfo: RateInfo_):
+    def parseTime_(element: TXmlNode, rateInfo: RateInfo_):
         start = TtmlTextParser.parseTimeAttribute_(
             element.getAttribute('begin'), rateInfo)
         end = TtmlTextParser.parseTimeAttribute_(
@@ -354,7 +369,7 @@ class TtmlTextParser:
         return ret
 
     @staticmethod
-    def addStyle_(cue, cueElement, region, imageElement: Element, styles: List[Element], isNested: bool, isLeaf: bool):
+    def addStyle_(cue, cueElement, region, imageElement: TXmlNode, styles: Dict[str, TXmlNode], isNested: bool, isLeaf: bool):
         shouldInheritRegionStyles = isNested or isLeaf
 
         _direction = TtmlTextParser.getStyleAttribute_(
@@ -511,7 +526,7 @@ class TtmlTextParser:
         return None
 
     @staticmethod
-    def parseCueRegion_(regionElement: Element, styles: List[Element], globalExtent: str):
+    def parseCueRegion_(regionElement: TXmlNode, styles: Dict[str, TXmlNode], globalExtent: str):
         region = CueRegion()
         _id = regionElement.getAttribute('xml:id')
         if not _id:
@@ -574,12 +589,12 @@ class TtmlTextParser:
         return region
 
     @staticmethod
-    def getInheritedStyleAttribute_(element: Element, styles, attribute):
+    def getInheritedStyleAttribute_(element: TXmlNode, styles, attribute):
         ttsNs = styleNs_
         ebuttsNs = styleEbuttsNs_
 
         inheritedStyles = TtmlTextParser.getElementsFromCollection_(
-            element, 'style', styles, '')  # tpye: List[Element]
+            element, 'style', styles, '')  # tpye: List[TXmlNode]
 
         styleValue = None
         # The last value in our styles stack takes the precedence over the others
@@ -605,7 +620,7 @@ class TtmlTextParser:
         return styleValue
 
     @staticmethod
-    def getStyleAttributeFromElement_(cueElement: Element, styles, attribute: str):
+    def getStyleAttributeFromElement_(cueElement: TXmlNode, styles, attribute: str):
         ttsNs = styleNs_
         elementAttribute = cueElement.getAttributeNS(ttsNs, attribute)
         if elementAttribute:
@@ -613,7 +628,7 @@ class TtmlTextParser:
         return TtmlTextParser.getInheritedStyleAttribute_(cueElement, styles, attribute)
 
     @staticmethod
-    def getInheritedAttribute_(element: Element, attributeName: str, nsName: str):
+    def getInheritedAttribute_(element: TXmlNode, attributeName: str, nsName: str):
         ret = None
         while element:
             if nsName:
@@ -623,14 +638,14 @@ class TtmlTextParser:
             if ret:
                 break
             parentNode = element.parentNode
-            if isinstance(parentNode, Element):
+            if parentNode is not None and parentNode.nodeType == TXmlNode.ELEMENT_NODE:
                 element = parentNode
             else:
                 break
         return ret
 
     @staticmethod
-    def getElementsFromCollection_(element: Element, attributeName: str, collection: list, prefixName: str, nsName: str = None):
+    def getElementsFromCollection_(element: TXmlNode, attributeName: str, collection: Dict[str, TXmlNode], prefixName: str, nsName: str = None):
         items = []
         if not element or len(collection) < 1:
             return items
@@ -640,14 +655,16 @@ class TtmlTextParser:
             return items
         itemNames = attributeValue.split(' ')
         for name in itemNames:
-            for item in collection:
-                if prefixName + item.getAttribute('xml:id') == name:
-                    items.append(item)
-                    break
+            # collection是按xml:id建立的字典
+            if not name.startswith(prefixName):
+                continue
+            item = collection.get(name[len(prefixName):])
+            if item is not None:
+                items.append(item)
         return items
 
     @staticmethod
-    def getStyleAttributeFromRegion_(region: Element, styles, attribute):
+    def getStyleAttributeFromRegion_(region: TXmlNode, styles, attribute):
         ttsNs = styleNs_
         if not region:
             return None
@@ -10,14 +10,29 @@ class Endianness(Enum):
     LITTLE_ENDIAN = 1
 
 
+UINT32_BE = struct.Struct('>I')
+UINT32_LE = struct.Struct('<I')
+INT32_BE = struct.Struct('>i')
+INT32_LE = struct.Struct('<i')
+
+
 class DataView:
     '''
     shaka/util/buffer_utils.js
     '''
 
-    def __init__(self, data: bytes):
-        self.buffer = memoryview(bytearray(data))
-        # self.buffer = memoryview(bytearray([0x96, 0x87, 0xac]))
+    def __init__(self, data, offset: int = 0, length: int = None):
+        # 不再复制数据 直接在原buffer上创建视图 嵌套的box也共享同一个buffer
+        if isinstance(data, DataView):
+            buffer = data.buffer
+        else:
+            buffer = memoryview(data)
+            if buffer.format != 'B' or buffer.ndim != 1:
+                buffer = buffer.cast('B')
+        if offset or length is not None:
+            end = len(buffer) if length is None else offset + length
+            buffer = buffer[offset:end]
+        self.buffer = buffer  # type: memoryview
         self.byteLength = len(self.buffer)  # type: int
 
     def getUint8(self):
@@ -26,25 +41,19 @@ class DataView:
     def getUint16(self):
         pass
 
-    def getUint32(self, position: int, littleEndian: bool = False):
+    def unpack_(self, fmt: struct.Struct, position: int):
+        if position + 4 <= self.byteLength:
+            return fmt.unpack_from(self.buffer, position)[0]
         # 这里记得切片长度要补齐4位 不然unpack会报错
         buf = self.buffer[position:position + 4].tobytes()
-        if len(buf) < 4:
-            buf = b'\x00' * (4 - len(buf)) + buf
-        if littleEndian:
-            return struct.unpack("<I", buf)[0]
-        else:
-            return struct.unpack(">I", buf)[0]
+        return fmt.unpack(b'\x00' * (4 - len(buf)) + buf)[0]
+
+    def getUint32(self, position: int, littleEndian: bool = False):
+        return self.unpack_(UINT32_LE if littleEndian else UINT32_BE, position)
 
     def getUint64(self, position: int, littleEndian: bool = False):
-        # 这里记得切片长度要补齐4位 不然
-        buf = self.buffer[position:position + 4].tobytes()
-        if len(buf) < 4:
-            buf = b'\x00' * (4 - len(buf)) + buf
-        if littleEndian:
-            return struct.unpack("<I", buf)[0]
-        else:
-            return struct.unpack(">I", buf)[0]
+        # 和原来一样只读取4位
+        return self.unpack_(UINT32_LE if littleEndian else UINT32_BE, position)
 
     def getInt8(self):
         pass
@@ -53,13 +62,7 @@ class DataView:
         pass
 
     def getInt32(self, position: int, littleEndian: bool = False):
-        buf = self.buffer[position:position + 4].tobytes()
-        if len(buf) < 4:
-            buf = b'\x00' * (4 - len(buf)) + buf
-        if littleEndian:
-            return struct.unpack("<i", buf)[0]
-        else:
-            return struct.unpack(">i", buf)[0]
+        return self.unpack_(INT32_LE if littleEndian else INT32_BE, position)
 
     def getInt64(self):
         pass
@@ -93,13 +96,20 @@ class DataView:
             length = data.byteLength
         return data.buffer[offset:offset + length].tobytes()
 
+    @staticmethod
+    def toView(data: 'DataView', offset: int = 0, length: int = None) -> memoryview:
+        # 和toUint8一样 但返回的是视图 不复制数据
+        if length is None:
+            length = data.byteLength
+        return data.buffer[offset:offset + length]
+
 
 class DataViewReader(DataView):
     '''
     shaka/util/data_view_reader.js
     '''
 
-    def __init__(self, data: bytes, endianness: Endianness):
+    def __init__(self, data, endianness: Endianness):
         self.dataView_ = DataView(data)  # type: DataView
         self.littleEndian_ = endianness == Endianness.LITTLE_ENDIAN  # type: bool
         self.position_ = 0  # type: int
@@ -154,6 +164,17 @@ class DataViewReader(DataView):
         self.position_ += length
         return data
 
+    def readView(self, length: int) -> memoryview:
+        '''
+        和readBytes一样 但返回的是父buffer上的视图 用于创建嵌套的reader
+        '''
+        assert length >= 0, 'Bad call to DataViewReader.readView'
+        if self.position_ + length > self.dataView_.byteLength:
+            raise OutOfBoundsError
+        data = DataView.toView(self.dataView_, self.position_, length)
+        self.position_ += length
+        return data
+
     def skip(self, length: int):
         assert length >= 0, 'Bad call to DataViewReader.skip'
         if self.position_ + length > self.dataView_.byteLength:
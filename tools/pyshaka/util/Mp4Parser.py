@@ -101,7 +101,8 @@ class Mp4Parser:
                 self.done_ = True
                 return
             payloadSize = end - reader.getPosition()
-            payload = reader.readBytes(payloadSize) if payloadSize > 0 else b''
+            # payload是父buffer上的视图 不会复制数据
+            payload = reader.readView(payloadSize) if payloadSize > 0 else b''
 
             payloadReader = DataViewReader(payload, Endianness.BIG_ENDIAN)
 
@@ -141,9 +142,14 @@ class Mp4Parser:
                 break
 
     @staticmethod
-    def allData(callback: Callable):
+    def allData(callback: Callable, asView: bool = False):
+        '''
+        asView为True时回调拿到的是memoryview 适合还要继续解析的数据 比如mdat
+        '''
         def alldata_callback(box: ParsedBox):
             _all = box.reader.getLength() - box.reader.getPosition()
+            if asView:
+                return callback(box.reader.readView(_all))
             return callback(box.reader.readBytes(_all))
         return alldata_callback
 
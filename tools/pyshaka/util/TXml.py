@@ -0,0 +1,155 @@
+from typing import Dict, List, Tuple
+from xml.parsers import expat
+
+
+class TXmlNode:
+    '''
+    shaka/util/tXml.js
+    用expat事件一次性构建的轻量节点 只实现了TtmlTextParser用到的那部分minidom接口
+    '''
+
+    ELEMENT_NODE = 1
+    TEXT_NODE = 3
+    CDATA_SECTION_NODE = 4
+    COMMENT_NODE = 8
+    DOCUMENT_NODE = 9
+
+    __slots__ = ('nodeType', 'tagName', 'nodeValue', 'attributes', 'attributesNS',
+                 'childNodes', 'parentNode', 'elementsByTagName_')
+
+    def __init__(self, nodeType: int, tagName: str = '', nodeValue: str = None):
+        self.nodeType = nodeType
+        self.tagName = tagName
+        self.nodeValue = nodeValue
+        self.attributes = {}  # type: Dict[str, str]
+        self.attributesNS = {}  # type: Dict[Tuple[str, str], str]
+        self.childNodes = []  # type: List[TXmlNode]
+        self.parentNode = None  # type: TXmlNode
+        # 只有document节点才有 解析时按tagName收集的所有元素
+        self.elementsByTagName_ = None  # type: Dict[str, List[TXmlNode]]
+
+    @property
+    def firstChild(self) -> 'TXmlNode':
+        return self.childNodes[0] if self.childNodes else None
+
+    @property
+    def textContent(self) -> str:
+        if self.nodeType != TXmlNode.ELEMENT_NODE:
+            return self.nodeValue or ''
+        return ''.join(node.textContent for node in self.childNodes if node.nodeType != TXmlNode.COMMENT_NODE)
+
+    def getAttribute(self, name: str) -> str:
+        return self.attributes.get(name, '')
+
+    def getAttributeNS(self, namespaceURI: str, localName: str) -> str:
+        return self.attributesNS.get((namespaceURI, localName), '')
+
+    def hasAttribute(self, name: str) -> bool:
+        return name in self.attributes
+
+    def appendChild(self, node: 'TXmlNode') -> 'TXmlNode':
+        # 和minidom一样 会把节点从原来的父节点中移走
+        if node.parentNode is not None:
+            node.parentNode.childNodes.remove(node)
+        node.parentNode = self
+        self.childNodes.append(node)
+        return node
+
+    def getElementsByTagName(self, tagName: str) -> List['TXmlNode']:
+        if self.elementsByTagName_ is not None:
+            return self.elementsByTagName_.get(tagName, [])
+        elements = []
+        stack = list(reversed(self.childNodes))
+        while stack:
+            node = stack.pop()
+            if node.nodeType == TXmlNode.ELEMENT_NODE:
+                if node.tagName == tagName:
+                    elements.append(node)
+                stack.extend(reversed(node.childNodes))
+        return elements
+
+
+class TXml:
+
+    @staticmethod
+    def splitName_(name: str) -> Tuple[str, str, str]:
+        # namespace_prefixes开启后expat给出的名字是 'uri localName prefix'
+        parts = name.split(' ')
+        if len(parts) == 3:
+            return parts[0], parts[1], f'{parts[2]}:{parts[1]}'
+        if len(parts) == 2:
+            return parts[0], parts[1], parts[1]
+        return None, name, name
+
+    @staticmethod
+    def parseXmlString(data) -> TXmlNode:
+        '''
+        一次遍历构建节点树 同时按tagName建立索引 代替minidom.parseString
+        '''
+        document = TXmlNode(TXmlNode.DOCUMENT_NODE, '#document')
+        document.elementsByTagName_ = {}
+        current = document
+        inCData = False
+        cdataNode = None  # type: TXmlNode
+
+        def start_element(name: str, attrs: Dict[str, str]):
+            nonlocal current
+            _, _, qName = TXml.splitName_(name)
+            element = TXmlNode(TXmlNode.ELEMENT_NODE, qName)
+            for attrName, value in attrs.items():
+                ns, localName, attrQName = TXml.splitName_(attrName)
+                element.attributes[attrQName] = value
+                element.attributesNS[(ns, localName)] = value
+            element.parentNode = current
+            current.childNodes.append(element)
+            document.elementsByTagName_.setdefault(qName, []).append(element)
+            current = element
+
+        def end_element(name: str):
+            nonlocal current
+            current = current.parentNode
+
+        def character_data(text: str):
+            nonlocal cdataNode
+            # 和minidom一样 相邻的文本合并成一个节点 CDATA单独成节点
+            if inCData:
+                if cdataNode is not None:
+                    cdataNode.nodeValue += text
+                    return
+                node = cdataNode = TXmlNode(TXmlNode.CDATA_SECTION_NODE, nodeValue=text)
+            else:
+                childNodes = current.childNodes
+                if childNodes and childNodes[-1].nodeType == TXmlNode.TEXT_NODE:
+                    childNodes[-1].nodeValue += text
+                    return
+                node = TXmlNode(TXmlNode.TEXT_NODE, nodeValue=text)
+            node.parentNode = current
+            current.childNodes.append(node)
+
+        def start_cdata():
+            nonlocal inCData, cdataNode
+            inCData = True
+            cdataNode = None
+
+        def end_cdata():
+            nonlocal inCData
+            inCData = False
+
+        def comment(text: str):
+            node = TXmlNode(TXmlNode.COMMENT_NODE, nodeValue=text)
+            node.parentNode = current
+            current.childNodes.append(node)
+
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.namespace_prefixes = True
+        parser.buffer_text = True
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = character_data
+        parser.StartCdataSectionHandler = start_cdata
+        parser.EndCdataSectionHandler = end_cdata
+        parser.CommentHandler = comment
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        parser.Parse(data, True)
+        return document
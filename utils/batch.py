@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is for downloading subtitles of many urls in one run.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import shlex
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import orjson
+import validators
+from configs.config import app_name, filenames
+from services import get_service, load_service
+
+
+def get_job_parser() -> argparse.ArgumentParser:
+    """Parser of per-line options in batch file, e.g. https://www.viki.com/tv/xxx -s 1 -e 1-3 -slang en -o /path/to/output"""
+
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('url')
+    parser.add_argument('-s', '--season', dest='season')
+    parser.add_argument('-e', '--episode', dest='episode')
+    parser.add_argument('-l', '--last-episode', dest='last_episode',
+                        action='store_true', default=None)
+    parser.add_argument('-slang', '--subtitle-language',
+                        dest='subtitle_language')
+    parser.add_argument('-alang', '--audio-language',
+                        dest='audio_language')
+    parser.add_argument('-o', '--output', dest='output')
+    return parser
+
+
+def read_jobs(lines, args) -> list[dict]:
+    """Parse batch lines (blank lines and # comments are skipped) into jobs"""
+
+    parser = get_job_parser()
+    jobs = []
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        try:
+            options = parser.parse_args(shlex.split(line))
+        except (SystemExit, ValueError):
+            logger.warning("Ignore invalid line %s: %s", line_no, line)
+            continue
+
+        job_args = argparse.Namespace(**vars(args))
+        for key, value in vars(options).items():
+            if value is not None:
+                setattr(job_args, key, value)
+
+        job = create_job(options.url, job_args)
+        job['line'] = line_no
+        jobs.append(job)
+    return jobs
+
+
+def create_job(url: str, args: argparse.Namespace) -> dict:
+    """Create a job of url, service is None if url isn't supported"""
+
+    return {
+        'url': url,
+        'args': args,
+        'service': get_service(url) if validators.url(url) else None,
+        'status': 'pending',
+    }
+
+
+def get_job_info(job: dict) -> dict:
+    """Get job's options and result for summary"""
+
+    return {
+        'url': job['url'],
+        'platform': job['service']['name'] if job['service'] else None,
+        'season': job['args'].season,
+        'episode': job['args'].episode,
+        'subtitle_language': job['args'].subtitle_language,
+        'status': job['status'],
+        'error': job.get('error'),
+        'seconds': job.get('seconds'),
+    }
+
+
+class BatchRunner(object):
+    """
+    Run batch jobs with one service instance (session, cookies, proxy) per platform,
+    different platforms are downloaded concurrently.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.services = {}
+
+    def load_jobs(self, batch: str) -> list[dict]:
+        """Load jobs from batch file, - for stdin"""
+
+        if batch == '-':
+            return read_jobs(sys.stdin, self.args)
+        with open(batch, 'r', encoding='utf-8') as file:
+            return read_jobs(file, self.args)
+
+    def run_job(self, job: dict):
+        """Download one url with the platform's service instance"""
+
+        platform = job['service']['name']
+        start = time.monotonic()
+        job['status'] = 'running'
+        try:
+            if platform in self.services:
+                self.services[platform].set_job(job['args'])
+            else:
+                self.services[platform] = load_service(
+                    job['service'], job['args'])
+            self.services[platform].main()
+            job['status'] = 'done'
+        except SystemExit as error:
+            job['status'] = 'done' if not error.code else 'failed'
+            if error.code:
+                job['error'] = f'exit code {error.code}'
+        except Exception as error:  # pylint: disable=broad-except
+            logger.debug("%s", job['url'], exc_info=True)
+            job['status'] = 'failed'
+            job['error'] = repr(error)
+        job['seconds'] = round(time.monotonic() - start, 1)
+
+    def run_platform(self, jobs: list[dict]):
+        """Download jobs of the same platform one by one"""
+
+        for job in jobs:
+            logger.info("\n[%s] %s", job['service']['name'], job['url'])
+            self.run_job(job)
+
+    def run(self, batch: str, summary_path: str = '') -> dict:
+        """Run all jobs of batch file and write summary"""
+
+        start = datetime.now()
+        jobs = self.load_jobs(batch)
+
+        platforms = {}
+        for job in jobs:
+            if job['service']:
+                platforms.setdefault(job['service']['name'], []).append(job)
+            else:
+                job['status'] = 'unsupported'
+                logger.warning("Unsupported url on line %s: %s",
+                               job['line'], job['url'])
+
+        if platforms:
+            with ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+                list(executor.map(self.run_platform, platforms.values()))
+
+        summary = {
+            'start': start.isoformat(timespec='seconds'),
+            'seconds': int((datetime.now() - start).total_seconds()),
+            'total': len(jobs),
+            'done': sum(job['status'] == 'done' for job in jobs),
+            'failed': sum(job['status'] != 'done' for job in jobs),
+            'jobs': [dict(line=job['line'], **get_job_info(job)) for job in jobs]
+        }
+
+        if not summary_path:
+            summary_path = str(filenames.batch_summary).format(
+                app_name=app_name, log_time=start.strftime('%Y-%m-%d_%H-%M-%S'))
+        Path(summary_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(summary_path).write_bytes(orjson.dumps(
+            summary, option=orjson.OPT_INDENT_2))  # pylint: disable=maybe-no-member
+
+        logger.info("\nBatch: %s done, %s failed, summary: %s",
+                    summary['done'], summary['failed'], summary_path)
+        return summary
+
+
+if __name__:
+    logger = logging.getLogger(__name__)
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is for caching service API responses on disk.
+"""
+from __future__ import annotations
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+import orjson
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from configs.config import config
+
+# Request headers which change the response body (including the logged-in user), so they are part of the cache key
+VARY_HEADERS = ('accept', 'accept-language', 'authorization', 'cookie')
+
+
+def api_pattern(template: str) -> re.Pattern:
+    """Convert an [api] url template to regex, e.g. https://api.kktv.me/v3/titles/{title_id}"""
+
+    pattern = ''
+    for literal, field in re.findall(r'([^{]*)(\{[^}]*\})?', template):
+        pattern += re.escape(literal)
+        if field:
+            pattern += r'[^/?&]+'
+    return re.compile(f'^{pattern}(?:[?&].*)?$')
+
+
+class ResponseCache(object):
+    """
+    Opt-in on-disk cache of GET responses, enabled by [cache] in user_config.toml.
+
+    Each service declares cacheable endpoints in its toml as [cache] <api name> = <ttl seconds>.
+    Expired entries with ETag / Last-Modified are revalidated with a conditional request.
+    """
+
+    def __init__(self, folder_path: Path, rules: list[tuple[re.Pattern, int]]):
+        self.folder_path = Path(folder_path)
+        self.rules = rules
+        os.makedirs(self.folder_path, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, service_config: dict, platform: str) -> Optional[ResponseCache]:
+        """Load response cache from service config"""
+
+        if not config.cache.get('enabled') or not service_config.get('cache'):
+            return None
+
+        rules = []
+        for name, ttl in service_config['cache'].items():
+            template = service_config.get('api', {}).get(name)
+            if template:
+                rules.append((api_pattern(template), int(ttl)))
+
+        if not rules:
+            return None
+        return cls(Path(config.directories['cache']) / platform, rules)
+
+    def get_ttl(self, request: requests.PreparedRequest) -> Optional[int]:
+        """Get ttl of the request's endpoint, None if it isn't cacheable"""
+
+        if request.method != 'GET':
+            return None
+        return next((ttl for pattern, ttl in self.rules if pattern.match(request.url)), None)
+
+    def get_key(self, request: requests.PreparedRequest) -> str:
+        """Cache key: method + url + headers which vary the response (credentials are only hashed)"""
+
+        key = [request.method, request.url]
+        for header in VARY_HEADERS:
+            key.append(f"{header}:{request.headers.get(header, '')}")
+        return hashlib.sha256('\n'.join(key).encode('utf-8')).hexdigest()
+
+    def get(self, request: requests.PreparedRequest) -> Optional[dict]:
+        """Get cached entry of request"""
+
+        if self.get_ttl(request) is None:
+            return None
+        cache_file = self.folder_path / f'{self.get_key(request)}.json'
+        if not cache_file.is_file():
+            return None
+        try:
+            return orjson.loads(cache_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError):  # pylint: disable=maybe-no-member
+            return None
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Check entry hasn't expired"""
+
+        return entry['expires'] > time.time()
+
+    def add_validators(self, request: requests.PreparedRequest, entry: dict):
+        """Turn request into a conditional request of an expired entry"""
+
+        headers = CaseInsensitiveDict(entry['headers'])
+        if headers.get('ETag'):
+            request.headers['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+    def set(self, request: requests.PreparedRequest, response: requests.Response, entry: Optional[dict] = None) -> Optional[dict]:
+        """Store a 200 response, or extend the expiry of entry on 304 Not Modified"""
+
+        ttl = self.get_ttl(request)
+        if ttl is None:
+            return None
+
+        if response.status_code == 304 and entry:
+            entry['expires'] = time.time() + ttl
+        elif response.status_code == 200:
+            entry = {
+                'url': response.url,
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': dict(response.headers),
+                'content': base64.b64encode(response.content).decode('ascii'),
+                'expires': time.time() + ttl,
+            }
+        else:
+            return None
+
+        cache_file = self.folder_path / f'{self.get_key(request)}.json'
+        # unique temp file per writer, threads may cache the same url at the same time
+        with tempfile.NamedTemporaryFile(dir=self.folder_path, suffix='.tmp', delete=False) as tmp_file:
+            tmp_file.write(orjson.dumps(entry))
+        os.replace(tmp_file.name, cache_file)
+        logger.debug("Cache %s (%ss)", request.url, ttl)
+        return entry
+
+    def build_response(self, request: requests.PreparedRequest, entry: dict) -> requests.Response:
+        """Build response from cached entry"""
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        content = base64.b64decode(entry['content'])
+        response._content = content
+        # iter_content/iter_lines must use _content, raw is kept for callers which read it directly
+        response._content_consumed = True
+        response.raw = io.BytesIO(content)
+        response.url = entry['url']
+        response.request = request
+        return response
+
+
+if __name__:
+    logger = logging.getLogger(__name__)
@@ -6,10 +6,11 @@ This module is for I/O.
 """
 
 from __future__ import annotations
+import asyncio
 import logging
-import multiprocessing
 import os
 import re
+import ssl
 import sys
 from operator import itemgetter
 from pathlib import Path
@@ -17,9 +18,10 @@ from typing import Union
 from urllib.parse import quote
 
 from tqdm import tqdm
+import aiohttp
 import requests
 import pytomlpp
-from configs.config import user_agent, credentials
+from configs.config import config, user_agent, credentials
 from utils.helper import check_url_exist, get_locale
 
 
@@ -107,15 +109,11 @@ def download_file(url, output_path, headers=None):
         logger.warning(_("\nFile not found!"))
 
 
-def download_files(files, headers=None):
-    """Multi-processing download files"""
-
-    cpus = multiprocessing.cpu_count()
-    max_pool_size = 8
-    pool = multiprocessing.Pool(
-        cpus if cpus < max_pool_size else max_pool_size)
+def get_download_path(files):
+    """Get (url, output_path) pairs of files, numbering the segments of each path"""
 
     lang_paths = []
+    downloads = []
     for file in sorted(files, key=itemgetter('name')):
         if 'url' in file and 'name' in file and 'path' in file:
             if 'segment' in file and file['segment']:
@@ -130,10 +128,109 @@ def download_files(files, headers=None):
                 lang_paths.append(file['path'])
             else:
                 filename = os.path.join(file['path'], file['name'])
-            pool.apply_async(download_file, args=(
-                file['url'], filename, headers))
-    pool.close()
-    pool.join()
+            downloads.append((file['url'], filename))
+    return downloads
+
+
+async def fetch_file(client, semaphore, url, output_path=None, check_url=True):
+    """Download a file with the shared client session, into memory (return bytes) if output_path is None"""
+
+    async with semaphore:
+        created = False
+        try:
+            if check_url:
+                async with client.head(url) as res:
+                    if not res.ok:
+                        logger.warning(_("\nFile not found!"))
+                        return None
+
+            async with client.get(url) as res:
+                if not res.ok:
+                    logger.warning(_("\nFile not found!"))
+                    return None
+                if output_path is None:
+                    return await res.read()
+                with open(output_path, 'wb') as file:
+                    created = True
+                    async for data in res.content.iter_chunked(1024):
+                        file.write(data)
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logger.error(
+                "Failure - Unable to establish connection: %s.", error)
+        except OSError as error:
+            logger.error("Failure - Unable to write %s: %s.",
+                         output_path, error)
+        # Do not leave a partial file, which would look downloaded
+        if created:
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass
+        return None
+
+
+async def fetch_files(downloads, headers, max_connections, check_url) -> list:
+    """Download files concurrently over one connection pool, results are in the order of downloads"""
+
+    ctx = ssl.create_default_context()
+    ctx.set_ciphers('DEFAULT@SECLEVEL=1')
+    connector = aiohttp.TCPConnector(
+        ssl=ctx, limit=max_connections, limit_per_host=max_connections)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=10)
+    semaphore = asyncio.Semaphore(max_connections)
+
+    async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as client:
+        tasks = [asyncio.ensure_future(fetch_file(client, semaphore, url, output_path, check_url))
+                 for url, output_path in downloads]
+        with tqdm(total=len(tasks), unit='file') as progress_bar:
+            for task in asyncio.as_completed(tasks):
+                await task
+                progress_bar.update(1)
+        return [task.result() for task in tasks]
+
+
+def get_download_options(headers=None, max_connections=None, check_url=None) -> tuple:
+    """Get headers, max connections and check url, defaults from [downloader]"""
+
+    if not headers:
+        headers = {'User-Agent': user_agent}
+
+    if max_connections is None:
+        max_connections = config.downloader.get('max-connections', 8)
+
+    if check_url is None:
+        check_url = config.downloader.get('check-url', True)
+
+    return headers, max(int(max_connections), 1), check_url
+
+
+def download_files(files, headers=None, max_connections=None, check_url=None):
+    """Download files concurrently with per-host connection reuse"""
+
+    downloads = get_download_path(files)
+    if downloads:
+        asyncio.run(fetch_files(downloads, *get_download_options(
+            headers, max_connections, check_url)))
+
+
+def download_segments(files, headers=None, max_connections=None, check_url=None) -> dict[str, list[tuple[str, bytes]]]:
+    """
+    Download subtitle segments into memory without writing them to disk,
+    return {path: [(segment name, content), ...]} in segment order
+    """
+
+    downloads = get_download_path(files)
+    segments = {}
+    if downloads:
+        contents = asyncio.run(fetch_files([(url, None) for url, filename in downloads], *get_download_options(
+            headers, max_connections, check_url)))
+        for (url, filename), content in zip(downloads, contents):
+            segments.setdefault(os.path.dirname(filename), [])
+            if content:
+                segments[os.path.dirname(filename)].append(
+                    (os.path.basename(filename), content))
+    return segments
 
 
 def download_audio(m3u8_url, output):
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is for per-host rate limiting.
+"""
+from __future__ import annotations
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket(object):
+    """
+    Token bucket with multiplicative decrease on throttling and additive recovery
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        """Add the tokens accumulated since last update"""
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens +
+                          (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available"""
+
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self, delay: float):
+        """Server asked to slow down: halve the rate and hold every caller for delay seconds"""
+
+        with self.lock:
+            self.refill()
+            self.rate = max(self.rate / 2, self.max_rate / 16)
+            self.tokens = min(self.tokens, 0) - delay * self.rate
+
+    def recover(self):
+        """Request succeeded: step the rate back towards the configured one"""
+
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 16)
+
+
+class RateLimiter(object):
+    """
+    Per-host token buckets, configured by [rate_limit] in service's toml
+
+    rate:        requests per second for each host
+    burst:       maximum requests sent back-to-back
+    max_retries: maximum retries of a request answered with http 429
+    """
+
+    def __init__(self, rate: float, burst: int = 1, max_retries: int = 5):
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self.max_retries = int(max_retries)
+        self.buckets: dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, rate_limit: Optional[dict]) -> Optional[RateLimiter]:
+        """Load rate limiter from service config"""
+
+        if not rate_limit or not rate_limit.get('rate'):
+            return None
+        return cls(rate=rate_limit['rate'],
+                   burst=rate_limit.get('burst', 1),
+                   max_retries=rate_limit.get('max_retries', 5))
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        """Get token bucket of url's host"""
+
+        host = urlparse(url).hostname or ''
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url: str):
+        """Wait for the host of url to accept another request"""
+
+        self.get_bucket(url).acquire()
+
+    def success(self, url: str):
+        """Record a request which wasn't throttled"""
+
+        self.get_bucket(url).recover()
+
+    def throttled(self, url: str, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Record http 429 and return seconds to wait before retrying"""
+
+        delay = get_retry_after(retry_after)
+        if delay is None:
+            delay = min(2 ** attempt, 60)
+        logger.debug("Too many requests to %s, retry in %.1f seconds",
+                     urlparse(url).hostname, delay)
+        self.get_bucket(url).throttle(delay)
+        return delay
+
+
+def get_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """Parse Retry-After header (delay-seconds or HTTP-date)"""
+
+    if not retry_after:
+        return None
+    retry_after = retry_after.strip()
+    if retry_after.isdigit():
+        return float(retry_after)
+    try:
+        date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+if __name__:
+    logger = logging.getLogger(__name__)
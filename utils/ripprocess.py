@@ -15,11 +15,11 @@ import requests
 import orjson
 from configs.config import user_agent
 from constants import LANGUAGE_LIST
-from utils.subtitle import merge_subtitle_fragments
+from utils.subtitle import convert_cues_to_subtitle, format_subtitle, get_max_workers, merge_subtitle_fragments, set_ass_style
 from utils.helper import get_language_code
 from tools.XstreamDL_CLI.extractor import Extractor
 from tools.XstreamDL_CLI.downloader import Downloader
-from tools.pyshaka.main import parse
+from tools.pyshaka.main import SegmentConsumer, iter_cues, toMilliseconds, write_cues
 
 
 class XstreamArgs(object):
@@ -46,6 +46,7 @@ class XstreamArgs(object):
         self.audio_only = False
         self.all_videos = False
         self.all_audios = False
+        self.stream_types = []
         self.service = ''
         self.save_dir = Path(save_dir)
         self.select = False
@@ -76,6 +77,13 @@ class XstreamArgs(object):
         self.URI = None  # type: list
 
 
+# Segments from which pyshaka parses in a process pool (about 30 minutes of 2s segments),
+# shorter tracks parse in a fraction of a second, less than starting the pool and sending cues back
+PYSHAKA_PARALLEL_SEGMENTS = 1000
+# Segments above which pyshaka streams instead of parsing in parallel (about 5.5 hours of 2s segments)
+PYSHAKA_STREAM_SEGMENTS = 10000
+
+
 class PyshakaArgs(object):
     """
     Pyshaka args
@@ -87,6 +95,16 @@ class PyshakaArgs(object):
         self.segments_path = segments_path
         self.debug = True if log_level == logging.DEBUG else False
         self.segment_time = 0
+        # Long recordings are parsed as a stream (memory bounded by window),
+        # long tracks in parallel, which keeps all cues of the track until they are merged,
+        # and others in memory in this process
+        segments = len(os.listdir(segments_path)) if os.path.isdir(
+            segments_path) else 0
+        self.stream = segments > PYSHAKA_STREAM_SEGMENTS
+        self.window = 4
+        self.workers = get_max_workers(segments) if PYSHAKA_PARALLEL_SEGMENTS <= segments <= PYSHAKA_STREAM_SEGMENTS else 0
+        self.format = '.vtt'
+        self.output_path = None
 
 
 class RipProcess(object):
@@ -97,8 +115,8 @@ class RipProcess(object):
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    def download_subtitles_from_mpd(self, url, title, folder_path, url_patch=False, headers="", proxy="", log_level=logging.INFO, timescale=""):
-        """Download  subtitles from mpd url"""
+    def download_subtitles_from_mpd(self, url, title, folder_path, url_patch=False, headers="", proxy="", log_level=logging.INFO, timescale="", subtitle_format="", in_memory=True):
+        """Download  subtitles from mpd url, fmp4 subtitle segments are parsed in memory without writing to disk"""
         os.makedirs(folder_path, exist_ok=True)
 
         if not headers:
@@ -116,6 +134,8 @@ class RipProcess(object):
 
         args.disable_auto_concat = True
         args.enable_auto_delete = False
+        # only expand subtitle tracks of the manifest
+        args.stream_types = ['subtitle']
 
         extractor = Extractor(args)
         streams = extractor.fetch_metadata(url)
@@ -132,24 +152,35 @@ class RipProcess(object):
                 "\nSorry, there's no embedded subtitles in this video!")
             return
 
+        consumers = {}
+        if in_memory:
+            for index in sub_tracks:
+                stream = streams[index]
+                if any(segment.segment_type == 'init' for segment in stream.segments):
+                    consumer = SegmentConsumer(PyshakaArgs(
+                        os.path.join(folder_path, stream.get_name()), log_level))
+                    stream.consumer = lambda segment, data, consumer=consumer: consumer.add(
+                        segment.index, data)
+                    consumers[stream.get_name()] = consumer
+
         Downloader(args).download_streams(streams, sub_tracks)
 
+        for name, consumer in consumers.items():
+            filename = self.get_subtitle_filename(title, name, subtitle_format)
+            self.save_cues(consumer.iter_cues(),
+                           os.path.join(folder_path, filename))
+
         for segments_path in glob.glob(os.path.join(folder_path, "*subtitle*")):
-            subtitle_language = re.findall(
-                r'_subtitle_.+?_([^_\.]+)', segments_path)[0]
-            subtitle_language = get_language_code(
-                subtitle_language)
-
-            subtitle_language = next((
-                language[1] for language in LANGUAGE_LIST if subtitle_language in language), subtitle_language)
-            filename = f"{title}.{subtitle_language}.vtt"
+            if os.path.basename(segments_path) in consumers:
+                continue
             if os.path.exists(os.path.join(segments_path, 'init.mp4')):
                 if os.path.isdir(segments_path):
-                    self.extract_sub(segments_path, self.logger.level)
-
-                    os.rename(f"{segments_path}.vtt",
-                              os.path.join(folder_path, filename))
+                    filename = self.get_subtitle_filename(
+                        title, segments_path, subtitle_format)
+                    self.extract_sub(segments_path, self.logger.level,
+                                     os.path.join(folder_path, filename))
             else:
+                filename = self.get_subtitle_filename(title, segments_path)
                 with open(os.path.join(segments_path, 'raw.json'), 'rb') as file:
                     content = file.read().decode('utf-8')
 
@@ -172,11 +203,44 @@ class RipProcess(object):
             else:
                 os.remove(path)
 
-    def extract_sub(self, segments_path, log_level):
-        """Call pyshaka"""
+    def get_subtitle_filename(self, title, segments_path, subtitle_format=""):
+        """Get subtitle filename from the language of segments folder, pyshaka writes .srt/.ass directly, other formats are converted from .vtt later"""
+
+        subtitle_language = re.findall(
+            r'_subtitle_.+?_([^_\.]+)', segments_path)[0]
+        subtitle_language = get_language_code(
+            subtitle_language)
+
+        subtitle_language = next((
+            language[1] for language in LANGUAGE_LIST if subtitle_language in language), subtitle_language)
+        if subtitle_format in ('.srt', '.ass'):
+            return f"{title}.{subtitle_language}{subtitle_format}"
+        return f"{title}.{subtitle_language}.vtt"
+
+    def extract_sub(self, segments_path, log_level, file_path=""):
+        """Call pyshaka, and write its cues to file_path (.vtt/.srt/.ass) directly"""
 
         args = PyshakaArgs(segments_path, log_level)
-        parse(args)
+        if not file_path:
+            file_path = f"{segments_path}.vtt"
+        self.save_cues(iter_cues(args), file_path)
+
+    def save_cues(self, cues, file_path):
+        """Write pyshaka cues to file_path (.vtt/.srt/.ass)"""
+
+        subtitle_format = Path(file_path).suffix
+        if subtitle_format not in ('.srt', '.ass'):
+            write_cues(cues, Path(file_path), subtitle_format)
+            self.logger.info(os.path.basename(file_path))
+            return
+
+        subs = convert_cues_to_subtitle((toMilliseconds(cue.startTime), toMilliseconds(cue.endTime), cue.payload)
+                                        for cue in cues)
+        subs = format_subtitle(subs, zh_subtitle='.zh-Hant' in file_path)
+        if subtitle_format == '.ass':
+            subs = set_ass_style(subs)
+        subs.save(file_path, keep_unknown_html_tags=True, keep_ssa_tags=True)
+        self.logger.info(os.path.basename(file_path))
 
     def get_time_scale(self, mpd_url, headers):
         """Get time scale"""
@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is for running as a local HTTP/JSON server which keeps services warm between jobs.
+
+POST /jobs                 submit a job: {"url": ..., "season": ..., "episode": ..., "last_episode": ...,
+                           "subtitle_language": ..., "audio_language": ..., "output": ...,
+                           "subtitle_format": ..., "sync": ...}, options are validated as command line options
+GET  /jobs                 list jobs
+GET  /jobs/<id>            job status
+GET  /jobs/<id>/progress   stream job's log lines as ndjson until the job is finished
+"""
+from __future__ import annotations
+import argparse
+import logging
+import queue
+import re
+import threading
+import uuid
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import orjson
+from utils.batch import BatchRunner, create_job, get_job_info, get_job_parser
+
+JOB_OPTIONS = ('season', 'episode', 'last_episode', 'subtitle_language',
+               'audio_language', 'output', 'subtitle_format', 'sync')
+# options given as json true/false, others are strings (or numbers) as on command line
+JOB_FLAGS = ('last_episode', 'sync')
+# finished jobs kept for status queries, the oldest ones are dropped first
+MAX_FINISHED_JOBS = 1000
+
+# job of the current thread, it is copied to the threads of BaseService.run_concurrently
+current_job: ContextVar[Optional[dict]] = ContextVar('current_job', default=None)
+
+
+def get_server_job_parser() -> argparse.ArgumentParser:
+    """Parser of job options, the same as batch lines plus -sf and --sync"""
+
+    parser = argparse.ArgumentParser(
+        parents=[get_job_parser()], add_help=False)
+    parser.add_argument('-sf', '--subtitle-format', dest='subtitle_format')
+    parser.add_argument('--sync', dest='sync',
+                        action='store_true', default=None)
+    return parser
+
+
+def parse_job_options(options: dict) -> argparse.Namespace:
+    """Validate json job options by converting them to command line arguments, raise ValueError if invalid"""
+
+    unknown = set(options) - set(JOB_OPTIONS) - {'url'}
+    if unknown:
+        raise ValueError(f"unknown options: {', '.join(sorted(unknown))}")
+
+    parser = get_server_job_parser()
+    argv = []
+    for action in parser._actions:  # pylint: disable=protected-access
+        value = options.get(action.dest)
+        if value is None or action.dest == 'url':
+            continue
+        if action.dest in JOB_FLAGS:
+            if not isinstance(value, bool):
+                raise ValueError(f'{action.dest} must be true or false')
+            if value:
+                argv.append(action.option_strings[-1])
+        elif isinstance(value, (str, int)) and not isinstance(value, bool):
+            argv.append(f'{action.option_strings[-1]}={value}')
+        else:
+            raise ValueError(f'{action.dest} must be a string')
+
+    url = options.get('url')
+    if not isinstance(url, str) or not url:
+        raise ValueError('url is required')
+    try:
+        return parser.parse_args(argv + ['--', url])
+    except SystemExit as error:
+        raise ValueError('invalid options') from error
+
+
+class JobLogHandler(logging.Handler):
+    """Append log records to the job of the current thread (or its run_concurrently workers)"""
+
+    def __init__(self, server: JobServer):
+        super().__init__()
+        self.server = server
+        self.setFormatter(logging.Formatter('%(message)s'))
+
+    def emit(self, record):
+        job = current_job.get()
+        if job:
+            with self.server.changed:
+                job['progress'].append(self.format(record).strip())
+                self.server.changed.notify_all()
+
+
+class JobServer(object):
+    """
+    Job queue with one worker thread and one warm service instance per platform
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.runner = BatchRunner(args)
+        self.jobs: dict[str, dict] = {}
+        self.queues: dict[str, queue.Queue] = {}
+        self.lock = threading.Lock()
+        self.changed = threading.Condition()
+        logging.getLogger().addHandler(JobLogHandler(self))
+
+    def submit(self, options: dict) -> dict:
+        """Queue a job on its platform's worker, raise ValueError if options are invalid"""
+
+        job_options = parse_job_options(options)
+        job_args = argparse.Namespace(**vars(self.args))
+        for key, value in vars(job_options).items():
+            if value is not None:
+                setattr(job_args, key, value)
+
+        job = create_job(job_args.url, job_args)
+        job['id'] = uuid.uuid4().hex
+        job['progress'] = []
+        with self.lock:
+            self.jobs[job['id']] = job
+            self.remove_finished_jobs()
+
+        if not job['service']:
+            job['status'] = 'unsupported'
+            return job
+
+        platform = job['service']['name']
+        with self.lock:
+            if platform not in self.queues:
+                self.queues[platform] = queue.Queue()
+                threading.Thread(target=self.worker, args=(self.queues[platform],),
+                                 name=platform, daemon=True).start()
+        self.queues[platform].put(job)
+        return job
+
+    def remove_finished_jobs(self):
+        """Drop the oldest finished jobs when there are more than MAX_FINISHED_JOBS"""
+
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job['status'] not in ('pending', 'running')]
+        for job_id in finished[:len(finished) - MAX_FINISHED_JOBS]:
+            del self.jobs[job_id]
+
+    def worker(self, jobs: queue.Queue):
+        """Run queued jobs of a platform one by one"""
+
+        while True:
+            job = jobs.get()
+            token = current_job.set(job)
+            try:
+                self.runner.run_job(job)
+            finally:
+                current_job.reset(token)
+                with self.changed:
+                    self.changed.notify_all()
+
+    def get_job_info(self, job: dict) -> dict:
+        """Get job status"""
+
+        return dict(id=job['id'], **get_job_info(job))
+
+    def serve(self, address: str):
+        """Serve api on [host:]port until interrupted"""
+
+        host, _, port = address.rpartition(':')
+        httpd = ThreadingHTTPServer(
+            (host or '127.0.0.1', int(port)), get_request_handler(self))
+        logger.info("\nListening on http://%s:%s", *httpd.server_address[:2])
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+
+
+def get_request_handler(server: JobServer):
+    """Bind request handler to job server"""
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        """Local HTTP/JSON api"""
+
+        def send_json(self, data, status: int = 200):
+            body = orjson.dumps(data)  # pylint: disable=maybe-no-member
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            if self.path.rstrip('/') == '/jobs':
+                self.send_json([server.get_job_info(job)
+                               for job in list(server.jobs.values())])
+                return
+
+            match = re.match(r'^/jobs/(\w+)(/progress)?/?$', self.path)
+            job = server.jobs.get(match.group(1)) if match else None
+            if not job:
+                self.send_json({'error': 'job not found'}, 404)
+            elif match.group(2):
+                self.stream_progress(job)
+            else:
+                self.send_json(server.get_job_info(job))
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            if self.path.rstrip('/') != '/jobs':
+                self.send_json({'error': 'not found'}, 404)
+                return
+            try:
+                options = orjson.loads(self.rfile.read(
+                    int(self.headers.get('Content-Length', 0))))
+            except orjson.JSONDecodeError:  # pylint: disable=maybe-no-member
+                self.send_json({'error': 'invalid json'}, 400)
+                return
+            if not isinstance(options, dict):
+                self.send_json({'error': 'job options must be an object'}, 400)
+                return
+
+            try:
+                job = server.submit(options)
+            except ValueError as error:
+                self.send_json({'error': str(error)}, 400)
+                return
+            self.send_json(server.get_job_info(job),
+                           202 if job['service'] else 400)
+
+        def stream_progress(self, job: dict):
+            """Write each log line of job until it is finished"""
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+
+            sent = 0
+            while True:
+                with server.changed:
+                    server.changed.wait_for(lambda: len(job['progress']) > sent
+                                            or job['status'] not in ('pending', 'running'), timeout=30)
+                    lines = job['progress'][sent:]
+                    finished = job['status'] not in ('pending', 'running')
+                sent += len(lines)
+                for line in lines:
+                    self.wfile.write(orjson.dumps(  # pylint: disable=maybe-no-member
+                        {'message': line}) + b'\n')
+                if finished:
+                    self.wfile.write(orjson.dumps(  # pylint: disable=maybe-no-member
+                        server.get_job_info(job)) + b'\n')
+                    return
+                self.wfile.flush()
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return RequestHandler
+
+
+if __name__:
+    logger = logging.getLogger(__name__)
@@ -4,27 +4,100 @@
 """
 This module is to handle subtitle.
 """
+import codecs
 import glob
 import re
 import logging
+import multiprocessing
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import sys
+from typing import Optional
 import pysubs2
 from chardet import detect
 from utils.helper import get_locale
+from utils.webvtt import merge_webvtt_fragments
 from configs.config import config
 from constants import SUBTITLE_FORMAT
 
 
+# Encodings served by platforms which are decoded as CP950
+CP950_ENCODINGS = ('BIG5', 'GBK', 'GB2312', 'Windows-1252', 'ISO-8859-1')
+# Bytes given to chardet, starting from the first non-ascii byte
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# utf-32 boms must be checked before utf-16 boms (BOM_UTF32_LE starts with BOM_UTF16_LE)
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+# (subtitle format, platform) -> last detected encoding, a platform serves each format in one encoding
+encoding_cache = {}
+
+
+def get_encoding_key(file_path, platform="") -> Optional[tuple]:
+    """
+    Get encoding cache key of subtitle file, None without platform
+    """
+    return (Path(file_path).suffix.lower(), platform) if platform else None
+
+
+def detect_encoding(data: bytes, key=None) -> Optional[str]:
+    """
+    Detect encoding: bom, strict utf-8, cached encoding of source, then chardet on a sample
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+
+    try:
+        data.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    encoding = encoding_cache.get(key)
+    if encoding:
+        try:
+            data.decode(encoding)
+            return encoding
+        except (UnicodeDecodeError, LookupError):
+            pass
+
+    non_ascii = NON_ASCII.search(data)
+    start = non_ascii.start() if non_ascii else 0
+    encoding = detect(data[start:start + ENCODING_SAMPLE_SIZE])['encoding']
+    if encoding in CP950_ENCODINGS:
+        encoding = 'CP950'
+    if key and encoding:
+        encoding_cache[key] = encoding
+    return encoding
+
+
 def get_encoding_type(source):
     """
     Get file encoding type
     """
-    with open(source, 'rb') as source:
-        rawdata = source.read()
-    return detect(rawdata)['encoding']
+    return detect_encoding(Path(source).read_bytes())
+
+
+def decode_subtitle(data: bytes, from_codec=None, key=None) -> str:
+    """
+    Decode subtitle bytes (utf-8 or detected encoding)
+    """
+    if from_codec is None:
+        from_codec = detect_encoding(data, key)
+
+    if from_codec and from_codec.lower() != 'utf-8':
+        if from_codec in CP950_ENCODINGS:
+            from_codec = 'CP950'
+        return data.decode(from_codec, errors='replace')
+    return data.decode('utf-8')
 
 
 def convert_utf8(srcfile):
@@ -32,14 +105,11 @@ def convert_utf8(srcfile):
     Convert file to utf8
     """
 
-    from_codec = get_encoding_type(srcfile)
+    rawdata = Path(srcfile).read_bytes()
+    from_codec = detect_encoding(rawdata)
     try:
         if from_codec and from_codec.lower() != 'utf-8':
-            if from_codec == 'BIG5' or from_codec == 'GBK' or from_codec == 'GB2312' or from_codec == 'Windows-1252' or from_codec == 'ISO-8859-1':
-                from_codec = 'CP950'
-
-            with open(srcfile, 'r', encoding=from_codec, errors='replace') as input_src:
-                data = input_src.read()
+            data = decode_subtitle(rawdata, from_codec)
             with open(srcfile, 'w', encoding='UTF-8') as output_src:
                 output_src.write(data)
 
@@ -88,45 +158,102 @@ def set_ass_style(subs):
     return subs
 
 
-def convert_subtitle(folder_path="", platform="", subtitle_format="", locale=""):
+def convert_subtitle_file(file_path: str, subtitle_format: str, platform="", encoding=None) -> tuple:
     """
-    Convert subtitle to .srt or .ass
+    Decode, format and save subtitle as subtitle_format in one pass,
+    return new file path and the cached encoding of platform (encoding: the one cached by the parent process)
+    """
+    key = get_encoding_key(file_path, platform)
+    if key and encoding:
+        encoding_cache.setdefault(key, encoding)
+    subtitle_name = str(Path(file_path).with_suffix(subtitle_format))
+    subs = pysubs2.SSAFile.from_string(
+        decode_subtitle(Path(file_path).read_bytes(), key=key))
+    subs = format_subtitle(subs, zh_subtitle='.zh-Hant' in subtitle_name)
+    if subtitle_format == '.ass':
+        subs = set_ass_style(subs)
+    subs.save(subtitle_name, keep_unknown_html_tags=True, keep_ssa_tags=True)
+    os.remove(file_path)
+    return subtitle_name, encoding_cache.get(key)
+
+
+def get_max_workers(jobs: int) -> int:
+    """
+    Get number of post-processing processes, bounded by [subtitles] workers (0: cpu count)
+    """
+    workers = int(config.subtitles.get('workers') or 0) or os.cpu_count() or 1
+    return max(1, min(workers, jobs))
+
+
+def run_in_processes(func, *iterables) -> list:
+    """
+    Run func over iterables in a process pool, results are returned in order.
+    Workers are spawned rather than forked, since callers run in threads (batch runner, job server)
+    and a fork copies locks other threads may hold
+    """
+    jobs = list(zip(*iterables))
+    max_workers = get_max_workers(len(jobs))
+    if max_workers == 1:
+        return [func(*job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(func, *zip(*jobs)))
+
+
+def get_convertible_subtitles(folder_path, subtitle_format) -> list:
+    """
+    Get subtitles of folder which aren't in subtitle_format
+    """
+    if not os.path.isdir(folder_path):
+        return []
+    return [os.path.join(folder_path, file) for file in sorted(os.listdir(folder_path))
+            if Path(file).suffix.lower() != subtitle_format and is_subtitle(os.path.join(folder_path, file))]
+
+
+def convert_subtitles(folder_paths, subtitle_format="", locale="", platform=""):
+    """
+    Convert subtitles of several (language) folders to .srt or .ass in one process pool,
+    encodings are detected and cached by platform in this process, since the workers' caches are lost
     """
     _ = get_locale(__name__, locale)
 
     if not subtitle_format:
         subtitle_format = '.srt'
 
-    if os.path.exists(folder_path):
-        if os.path.isdir(folder_path):
-            display = True
-            folder = os.listdir(folder_path)
-            for file in sorted(folder):
-                extenison = Path(file).suffix.lower()
-                if is_subtitle(os.path.join(folder_path, file)) and extenison != subtitle_format:
-                    if display:
-                        logger.info(
-                            _("\nConvert %s to %s:\n---------------------------------------------------------------"), extenison, subtitle_format)
-                        display = False
-
-                    subtitle = os.path.join(folder_path, file)
-                    subtitle_name = subtitle.replace(
-                        extenison, subtitle_format)
-                    convert_utf8(subtitle)
-                    subs = pysubs2.load(subtitle)
-                    if '.zh-Hant' in subtitle_name:
-                        subs = format_zh_subtitle(subs)
-                    subs = format_subtitle(subs)
-                    if subtitle_format == '.ass':
-                        subs = set_ass_style(subs)
-                    subs.save(subtitle_name,
-                              keep_unknown_html_tags=True, keep_ssa_tags=True)
-                    logger.info(os.path.basename(subtitle_name))
-                    os.remove(subtitle)
-                    folder = os.listdir(folder_path)
-            if platform:
-                archive_subtitle(folder_path=os.path.normpath(
-                    folder_path), platform=platform, locale=locale)
+    subtitles = []
+    for folder_path in sorted(folder_paths):
+        subtitles += get_convertible_subtitles(folder_path, subtitle_format)
+
+    if subtitles:
+        logger.info(
+            _("\nConvert %s to %s:\n---------------------------------------------------------------"), Path(subtitles[0]).suffix.lower(), subtitle_format)
+
+        keys = [get_encoding_key(subtitle, platform) for subtitle in subtitles]
+        for key, subtitle in dict(zip(keys, subtitles)).items():
+            if key and key not in encoding_cache:
+                detect_encoding(Path(subtitle).read_bytes(), key)
+
+        results = run_in_processes(convert_subtitle_file, subtitles,
+                                   [subtitle_format] * len(subtitles),
+                                   [platform] * len(subtitles),
+                                   [encoding_cache.get(key) for key in keys])
+        for key, (subtitle_name, encoding) in zip(keys, results):
+            if key and encoding:
+                encoding_cache[key] = encoding
+            logger.info(os.path.basename(subtitle_name))
+
+
+def convert_subtitle(folder_path="", platform="", subtitle_format="", locale=""):
+    """
+    Convert subtitle to .srt or .ass
+    """
+    if os.path.isdir(folder_path):
+        convert_subtitles(folder_paths=[folder_path], subtitle_format=subtitle_format,
+                          locale=locale, platform=platform)
+        if platform:
+            archive_subtitle(folder_path=os.path.normpath(
+                folder_path), platform=platform, locale=locale)
 
 
 def archive_subtitle(folder_path, platform="", locale=""):
@@ -161,49 +288,179 @@ def archive_subtitle(folder_path, platform="", locale=""):
     shutil.make_archive(Path(folder_path).parent / zipname, 'zip', folder_path)
 
 
+# Maximum time of 'HH:MM:SS,mmm'
+MAX_REPRESENTABLE_TIME = 359999999
+
+# Same html tag handling as pysubs2's .srt parser
+SRT_TAGS = (
+    (re.compile(r'< *i *>'), r'{\\i1}'),
+    (re.compile(r'< */ *i *>'), r'{\\i0}'),
+    (re.compile(r'< *s *>'), r'{\\s1}'),
+    (re.compile(r'< */ *s *>'), r'{\\s0}'),
+    (re.compile(r'< *u *>'), r'{\\u1}'),
+    (re.compile(r'< */ *u *>'), r'{\\u0}'),
+    (re.compile(r'< *b *>'), r'{\\b1}'),
+    (re.compile(r'< */ *b *>'), r'{\\b0}'),
+    (re.compile(r'< */? *[a-zA-Z][^>]*>'), ''),
+)
+TRAILING_NUMBER = re.compile(r'\n+ *\d+ *$')
+
+
+def clamp_ms(ms: int) -> int:
+    """
+    Clamp ms to the range of 'HH:MM:SS,mmm'
+    """
+    return min(max(ms, 0), MAX_REPRESENTABLE_TIME)
+
+
 def ms_to_timestamp(ms: int) -> str:
     """
     Convert ms to 'HH:MM:SS,mmm'
     """
-    max_representable_time = 359999999
+    return "%02d:%02d:%02d,%03d" % (pysubs2.time.ms_to_times(clamp_ms(ms)))
+
 
-    if ms < 0:
-        ms = 0
-    if ms > max_representable_time:
-        ms = max_representable_time
-    return "%02d:%02d:%02d,%03d" % (pysubs2.time.ms_to_times(ms))
+def create_srt_event(start: int, end: int, text: str, strip_number: bool = False):
+    """
+    Create event as pysubs2's .srt parser does,
+    strip_number: strip trailing number line (the parser takes it as the next subtitle's index)
+    """
+    text = text.strip()
+    if strip_number:
+        text = TRAILING_NUMBER.sub('', text)
+    for pattern, tag in SRT_TAGS:
+        text = pattern.sub(tag, text)
+    return pysubs2.SSAEvent(start=clamp_ms(start), end=clamp_ms(end), text=text.replace('\n', '\\N'))
 
 
 def convert_list_to_subtitle(subs):
     """
-    Convert list to subtitle
+    Convert list to subtitle (same events as saving to .srt and loading it again)
+    """
+    subtitle = pysubs2.SSAFile()
+    subs = list(subs)
+    subtitle.events = [create_srt_event(sub.start, sub.end, sub.text.replace('\\n', '\n').replace('\\N', '\n'),
+                                        strip_number=index == len(subs) - 1)
+                       for index, sub in enumerate(subs)]
+    return subtitle
+
+
+def convert_cues_to_subtitle(cues):
+    """
+    Convert (start ms, end ms, text) cues to subtitle, e.g. cues extracted by pyshaka
+    (same events as loading them from .vtt)
     """
-    text = ''
-    for index, sub in enumerate(subs):
+    subtitle = pysubs2.SSAFile()
+    subtitle.events = [create_srt_event(start, end, text, strip_number=True)
+                       for start, end, text in cues]
+    return subtitle
 
-        text = text + str(index + 1) + '\n'
-        text = text + ms_to_timestamp(sub.start) + \
-            ' --> ' + ms_to_timestamp(sub.end) + '\n'
-        text = text + \
-            sub.text.replace('\\n', '\n').replace('\\N', '\n').strip()
-        text = text + '\n\n'
 
-    return pysubs2.ssafile.SSAFile.from_string(text)
+def normalize_subtitle_text(text: str) -> str:
+    """
+    Normalize subtitle text for comparison (line breaks, whitespace)
+    """
+    return ' '.join(text.replace('\\N', ' ').replace('\\n', ' ').split())
 
 
-def merge_same_subtitle(subs):
+def merge_same_subtitle(subs, max_gap=None):
     """
-    Merge same subtitles
+    Merge consecutive same subtitles whose gap is within max_gap ms, and remove empty ones
     """
-    for i, sub in enumerate(subs):
-        if i > 0 and sub.text == subs[i-1].text and sub.start - subs[i-1].end <= 20:
-            subs[i-1].end = sub.end
-            subs.pop(i)
-        elif sub.text == '':
-            subs.pop(i)
+    if max_gap is None:
+        max_gap = config.subtitles.get('merge-gap', 20)
+
+    events = []
+    previous_text = None
+    for sub in subs:
+        text = normalize_subtitle_text(sub.text)
+        if not text:
+            continue
+        if events and text == previous_text and sub.start - events[-1].end <= max_gap:
+            events[-1].end = max(events[-1].end, sub.end)
+            continue
+        events.append(sub)
+        previous_text = text
+
+    subs.events = events
     return subs
 
 
+def has_fragments(folder_path) -> bool:
+    """
+    Check folder contains subtitle fragments
+    """
+    return os.path.exists(folder_path) and bool(glob.glob(os.path.join(folder_path, '*.srt')) + glob.glob(os.path.join(folder_path, '*.vtt')))
+
+
+def get_shift_ms(name, shift_time=None) -> int:
+    """
+    Get offset (ms) of fragment name from shift_time [{'name': ..., 'offset': seconds}, ...]
+    """
+    if not shift_time:
+        return 0
+    return int(float(next((seg['offset'] for seg in shift_time if seg['name'] in name), 0)) * 1000)
+
+
+def merge_fragment_contents(fragments, file_path, subtitle_format='.srt', shift_time=None) -> str:
+    """
+    Merge in-memory subtitle fragments [(name, content), ...] into file_path (suffix replaced by subtitle_format),
+    return merged file path
+    """
+    extenison = Path(file_path).suffix.lower()
+    file_path = file_path.replace(extenison, subtitle_format)
+
+    if subtitle_format == '.vtt':
+        with open(file_path, 'w', encoding='utf-8') as file:
+            merge_webvtt_fragments(fragments=((content.decode('utf-8'), get_shift_ms(name, shift_time))
+                                              for name, content in fragments), output=file)
+        return file_path
+
+    subtitles = []
+    for name, content in fragments:
+        subs = pysubs2.SSAFile.from_string(content.decode('utf-8'))
+        if shift_time:
+            offset = next(
+                (seg['offset'] for seg in shift_time if seg['name'] in name), '')
+            subs.shift(s=offset)
+        subs = clean_subs(subs)
+        if 'comment' in name:
+            add_comment(subs)
+        subtitles += subs
+    subs = convert_list_to_subtitle(subtitles)
+    subs = merge_same_subtitle(subs)
+    subs.sort()
+    subs = format_subtitle(
+        subs, zh_subtitle='.zh-Hant' in file_path or '.cmn-Hant' in file_path)
+    if subtitle_format == '.ass':
+        subs = set_ass_style(subs)
+    subs.save(file_path, keep_unknown_html_tags=True, keep_ssa_tags=True)
+    return file_path
+
+
+def read_fragments(folder_path):
+    """
+    Read subtitle fragments of folder in name order
+    """
+    for segment in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, segment)
+        if is_subtitle(file_path):
+            yield file_path, Path(file_path).read_bytes()
+
+
+def merge_fragments(folder_path, filename, subtitle_format='.srt', shift_time=None) -> str:
+    """
+    Merge subtitle fragments of folder into filename (in parent folder), return merged file path
+    """
+    file_path = merge_fragment_contents(fragments=read_fragments(folder_path),
+                                        file_path=os.path.join(
+                                            Path(folder_path).parent.absolute(), filename),
+                                        subtitle_format=subtitle_format, shift_time=shift_time)
+    if os.path.exists(folder_path):
+        shutil.rmtree(folder_path)
+    return file_path
+
+
 def merge_subtitle_fragments(folder_path="", filename="", subtitle_format="", locale="", display=False, shift_time=None):
     """
     Merge subtitle fragments
@@ -213,74 +470,62 @@ def merge_subtitle_fragments(folder_path="", filename="", subtitle_format="", lo
     if not subtitle_format:
         subtitle_format = '.srt'
 
-    if os.path.exists(folder_path) and glob.glob(os.path.join(folder_path, '*.srt')) + glob.glob(os.path.join(folder_path, '*.vtt')):
+    if has_fragments(folder_path):
         if display:
             logger.info(_(
                 "\nMerge segments：\n---------------------------------------------------------------"))
 
-        if subtitle_format == '.vtt':
-            subtitle = ""
-            skip = False
-            for index, segment in enumerate(sorted(os.listdir(folder_path))):
-                file_path = os.path.join(folder_path, segment)
-                if is_subtitle(file_path):
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        text = file.read()
-                        if text.count('\n') <= 6:
-                            if index == 0:
-                                skip = True
-                            continue
-
-                        if index > 0:
-                            if not skip:
-                                text = re.sub(
-                                    r'^WEBVTT\n', '', text)
-                                text = re.sub(
-                                    r'X-TIMESTAMP-MAP.+\n\n', '', text)
-                                text = re.sub(
-                                    r'STYLE\n::cue\(\) \{\n((.|\n)*)\}\n\n', '', text)
-                            skip = False
-                    subtitle += text
-            file_path = os.path.join(
-                Path(folder_path).parent.absolute(), filename)
-            extenison = Path(file_path).suffix.lower()
-            file_path = file_path.replace(extenison, subtitle_format)
-            with open(file_path.replace(extenison, subtitle_format), 'w', encoding='utf-8') as file:
-                file.write(subtitle)
-            logger.info(os.path.basename(file_path))
-            if os.path.exists(folder_path):
-                shutil.rmtree(folder_path)
-            return
-
-        subtitles = []
-        for segment in sorted(os.listdir(folder_path)):
-            file_path = os.path.join(folder_path, segment)
-            if is_subtitle(file_path):
-                subs = pysubs2.load(file_path)
-                if shift_time:
-                    offset = next(
-                        (seg['offset'] for seg in shift_time if seg['name'] in file_path), '')
-                    subs.shift(s=offset)
-                subs = clean_subs(subs)
-                if 'comment' in file_path:
-                    add_comment(subs)
-                subtitles += subs
-        subs = convert_list_to_subtitle(subtitles)
-        subs = merge_same_subtitle(subs)
-        file_path = os.path.join(
-            Path(folder_path).parent.absolute(), filename)
-        subs.sort()
-        if '.zh-Hant' in file_path or '.cmn-Hant' in file_path:
-            subs = format_zh_subtitle(subs)
-        subs = format_subtitle(subs)
-        extenison = Path(file_path).suffix.lower()
-        file_path = file_path.replace(extenison, subtitle_format)
-        if subtitle_format == '.ass':
-            subs = set_ass_style(subs)
-        subs.save(file_path, keep_unknown_html_tags=True, keep_ssa_tags=True)
+        file_path = merge_fragments(folder_path=folder_path, filename=filename,
+                                    subtitle_format=subtitle_format, shift_time=shift_time)
         logger.info(os.path.basename(file_path))
-        if os.path.exists(folder_path):
-            shutil.rmtree(folder_path)
+
+
+def merge_subtitle_segments(segments, subtitle_format="", locale=""):
+    """
+    Merge in-memory segments {tmp_ path: [(name, content), ...]} (from download_segments) in one process pool
+    """
+    _ = get_locale(__name__, locale)
+
+    if not subtitle_format:
+        subtitle_format = '.srt'
+
+    folder_paths = [folder_path for folder_path in sorted(segments)
+                    if 'tmp' in folder_path and segments[folder_path]]
+    if folder_paths:
+        logger.info(_(
+            "\nMerge segments：\n---------------------------------------------------------------"))
+
+        file_paths = run_in_processes(merge_fragment_contents,
+                                      [segments[folder_path]
+                                          for folder_path in folder_paths],
+                                      [os.path.join(os.path.dirname(folder_path), os.path.basename(folder_path).replace('tmp_', ''))
+                                       for folder_path in folder_paths],
+                                      [subtitle_format] * len(folder_paths))
+        for file_path in file_paths:
+            logger.info(os.path.basename(file_path))
+
+
+def merge_subtitle_folders(folder_paths, subtitle_format="", locale=""):
+    """
+    Merge fragments of several (language) tmp_ folders in one process pool
+    """
+    _ = get_locale(__name__, locale)
+
+    if not subtitle_format:
+        subtitle_format = '.srt'
+
+    folder_paths = [folder_path for folder_path in sorted(folder_paths)
+                    if 'tmp' in folder_path and has_fragments(folder_path)]
+    if folder_paths:
+        logger.info(_(
+            "\nMerge segments：\n---------------------------------------------------------------"))
+
+        file_paths = run_in_processes(merge_fragments, folder_paths,
+                                      [os.path.basename(folder_path.replace('tmp_', ''))
+                                       for folder_path in folder_paths],
+                                      [subtitle_format] * len(folder_paths))
+        for file_path in file_paths:
+            logger.info(os.path.basename(file_path))
 
 
 def add_comment(subs):
@@ -292,45 +537,71 @@ def add_comment(subs):
     return subs
 
 
-def format_zh_subtitle(subs):
-    """
-    Format Chinese subtitle
-    """
-    if not config.subtitles['fix-subtitle']:
-        return subs
+# Compiled rules of clean_subs / format_zh_subtitle / format_subtitle, each applied in one pass per cue
+CJK = '\u4E00-\u9FFF'
 
-    for sub in subs:
-        text = sub.text
-        if re.search(r'[\u4E00-\u9FFF]', text):
-            text = text.replace('(', '（')
-            text = text.replace(')', '）')
-            text = text.replace('!', '！')
-            text = text.replace('?', '？')
-            text = text.replace(':', '：')
-            text = text.replace('...', '…')
-            text = text.replace(' （', '（')
-            text = text.replace('） ', '）')
-            text = text.replace('） ', '）')
-            text = text.replace('） ', '）')
+CLEAN_RULES = {'&rlm;': '', '&lrm;': '', '&amp;': '&'}
+CLEAN_PATTERN = re.compile('|'.join(map(re.escape, CLEAN_RULES)))
 
-            if text.count('-') == 2:
-                text = text.replace('- ', '-')
+ZH_TABLE = str.maketrans({'(': '（', ')': '）', '!': '！', '?': '？', ':': '：'})
+ZH_PATTERN = re.compile(
+    rf'(?P<ellipsis>\.\.\.)|(?P<open> （)|(?P<close>） {{1,3}})'
+    rf'|(?P<comma>,(?=[{CJK}])|(?<=[{CJK}]),)|(?P<dash>\u3000\u3000)')
+ZH_RULES = {'ellipsis': '…', 'open': '（', 'close': '）', 'comma': '，', 'dash': ' -'}
+# Conversation dashes stay separate passes: whether ' -' starts a new line depends on the whole cue
+# after the rules above, and the first line is only marked once those line breaks exist
+ZH_CHARACTER = re.compile(rf'[{CJK}]')
+ZH_CONVERSATION = re.compile(rf'( )-[ {CJK}「0-9]+')
+ZH_FIRST_LINE = re.compile(rf'(^[「{CJK}]+.*?)\n-')
 
-            text = re.sub(r',([\u4E00-\u9FFF]+)', '，\\1', text)
-            text = re.sub(r'([\u4E00-\u9FFF]+),', '\\1，', text)
+FORMAT_TABLE = str.maketrans(
+    {'\u200b': None, '\u200e': None, '\u202a': None, '\ufeff': None, '\xa0': ' '})
+FORMAT_PATTERN = re.compile(r'{\\([bi])([01])}')
+
+
+def clean_text(text: str) -> str:
+    """
+    Remove redundant html entities of text
+    """
+    return CLEAN_PATTERN.sub(lambda match: CLEAN_RULES[match.group()], text).strip()
 
-            text = re.sub(r'\u3000\u3000', ' -', text)
 
-            conversation = re.search(r'( )-[ \u4E00-\u9FFF「0-9]+', text)
-            if conversation:
-                text = text.replace(' -', '\n-')
+def format_zh_text(text: str) -> str:
+    """
+    Use full-width punctuation and fix conversation dashes of Chinese text
+    """
+    if ZH_CHARACTER.search(text):
+        text = text.translate(ZH_TABLE)
+        if text.count('-') == 2:
+            text = text.replace('- ', '-')
+        text = ZH_PATTERN.sub(
+            lambda match: ZH_RULES[match.lastgroup], text)
+        if ZH_CONVERSATION.search(text):
+            text = text.replace(' -', '\n-')
+        text = ZH_FIRST_LINE.sub('-\\1\n-', text)
+
+    text = text.replace('  ', ' ')
+    text = text.replace('\xa0 ', ' ')
+    return text.strip()
+
+
+def format_text(text: str) -> str:
+    """
+    Remove invisible characters and convert bold/italic tags of text
+    """
+    return FORMAT_PATTERN.sub(lambda match: f"<{'' if match.group(2) == '1' else '/'}{match.group(1)}>",
+                              text.translate(FORMAT_TABLE))
 
-            text = re.sub(r'(^[「\u4E00-\u9FFF]+.*?)\n-', '-\\1\n-', text)
 
-        text = text.replace('  ', ' ')
-        text = text.replace('  ', ' ')
+def format_zh_subtitle(subs):
+    """
+    Format Chinese subtitle
+    """
+    if not config.subtitles['fix-subtitle']:
+        return subs
 
-        sub.text = text.strip()
+    for sub in subs:
+        sub.text = format_zh_text(sub.text)
 
     return subs
 
@@ -340,35 +611,24 @@ def clean_subs(subs):
     Clean redundant subtitles
     """
     for sub in subs:
-        text = sub.text
-        text = re.sub(r"&rlm;", "", text)
-        text = re.sub(r"&lrm;", "", text)
-        text = re.sub(r"&amp;", "&", text)
-        sub.text = text.strip()
+        sub.text = clean_text(sub.text)
     return subs
 
 
-def format_subtitle(subs):
+def format_subtitle(subs, zh_subtitle=False):
     """
-    Format subtitle
+    Format subtitle (and Chinese subtitle) in one pass, remove empty subtitles
     """
-    delete_list = []
-    for i, sub in enumerate(subs):
-        sub.text = re.sub(r'\u200b', '', sub.text)
-        sub.text = re.sub(r'\u200e', '', sub.text)
-        sub.text = re.sub(r'\u202a', '', sub.text)
-        sub.text = re.sub(r'\ufeff', '', sub.text)
-        sub.text = re.sub(r'\xa0', ' ', sub.text)
+    zh_subtitle = zh_subtitle and config.subtitles['fix-subtitle']
 
-        sub.text = re.sub(r'{\\b1}', '<b>', sub.text)
-        sub.text = re.sub(r'{\\b0}', '</b>', sub.text)
-        sub.text = re.sub(r'{\\i1}', '<i>', sub.text)
-        sub.text = re.sub(r'{\\i0}', '</i>', sub.text)
-        if sub.text == "":
-            delete_list.append(i)
-
-    for i in reversed(delete_list):
-        del subs[i]
+    events = []
+    for sub in subs:
+        if zh_subtitle:
+            sub.text = format_zh_text(sub.text)
+        sub.text = format_text(sub.text)
+        if sub.text != "":
+            events.append(sub)
+    subs.events = events
 
     return subs
 
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is for incremental (sync) downloads.
+"""
+from __future__ import annotations
+import hashlib
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+import orjson
+
+
+class SyncManifest(object):
+    """
+    Record of downloaded (episode, language) subtitles kept next to the output folder,
+    so that --sync can skip them before requesting any playback api.
+    """
+
+    def __init__(self, folder_path):
+        self.path = self.get_path(folder_path)
+        self.episodes: dict[str, dict] = {}
+        # episodes whose subtitles of all available languages were downloaded
+        self.completed: set[str] = set()
+        if self.path.is_file():
+            try:
+                data = orjson.loads(self.path.read_bytes())
+                self.episodes = data.get('episodes', {})
+                self.completed = set(data.get('completed', []))
+            except orjson.JSONDecodeError:  # pylint: disable=maybe-no-member
+                logger.warning("Ignore broken %s", self.path)
+
+    @staticmethod
+    def get_path(folder_path) -> Path:
+        """Get manifest path of output folder, outside of it so that it is not archived with the subtitles"""
+
+        folder_path = Path(folder_path)
+        return folder_path.parent / f'.{folder_path.name}.sync.json'
+
+    def has(self, episode_id, languages) -> bool:
+        """Check all requested languages of episode were downloaded"""
+
+        downloaded = self.episodes.get(str(episode_id))
+        if not downloaded:
+            return False
+        if 'all' in languages:
+            return str(episode_id) in self.completed
+        return all(language in downloaded for language in languages)
+
+    def add(self, episode_id, language: str, url: str, file_path) -> bool:
+        """Record a downloaded subtitle with its source url, size and hash, skip missing or empty file"""
+
+        file_path = Path(file_path)
+        data = file_path.read_bytes() if file_path.is_file() else b''
+        if not data:
+            logger.warning("Skip recording %s: download failed", file_path.name)
+            return False
+        self.episodes.setdefault(str(episode_id), {})[language] = {
+            'url': url,
+            'file': file_path.name,
+            'size': len(data),
+            'sha1': hashlib.sha1(data).hexdigest(),
+            'time': datetime.now().isoformat(timespec='seconds'),
+        }
+        return True
+
+    def complete(self, episode_id):
+        """Mark all available languages of episode were downloaded"""
+
+        self.completed.add(str(episode_id))
+
+    def save(self):
+        """Write manifest to output folder"""
+
+        os.makedirs(self.path.parent, exist_ok=True)
+        self.path.write_bytes(orjson.dumps(
+            {'episodes': self.episodes, 'completed': sorted(self.completed)}, option=orjson.OPT_INDENT_2))  # pylint: disable=maybe-no-member
+
+
+if __name__:
+    logger = logging.getLogger(__name__)
@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+"""
+This module is to merge WebVTT fragments (HLS/DASH subtitle segments).
+"""
+from __future__ import annotations
+import logging
+import re
+from typing import Iterable, Optional, TextIO
+
+TIMESTAMP = r'(?:(\d+):)?(\d{2}):(\d{2})[\.,](\d{3})'
+TIMING_LINE = re.compile(
+    rf'^\s*{TIMESTAMP}\s+-->\s+{TIMESTAMP}(?P<settings>[^\n]*)$')
+TIMESTAMP_MAP = re.compile(
+    rf'^X-TIMESTAMP-MAP=(?=.*MPEGTS:(?P<mpegts>\d+))(?=.*LOCAL:{TIMESTAMP})', re.MULTILINE)
+BLANK_LINES = re.compile(r'\n[ \t]*\n')
+# MPEG-TS presentation timestamps are 33 bits at 90 kHz
+MPEGTS_ROLLOVER = 1 << 33
+
+
+def timestamp_to_ms(hours: Optional[str], minutes: str, seconds: str, ms: str) -> int:
+    """Convert matched timestamp groups to ms"""
+
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(ms)
+
+
+def ms_to_vtt_timestamp(ms: int) -> str:
+    """Convert ms to 'HH:MM:SS.mmm'"""
+
+    ms = max(ms, 0)
+    return f'{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}'
+
+
+class WebVTTMerger(object):
+    """
+    Merge WebVTT fragments into one file in a single pass:
+    X-TIMESTAMP-MAP of each fragment is applied relative to the first fragment's map,
+    and cues repeated across fragment boundaries are merged.
+    """
+
+    def __init__(self, output: TextIO):
+        self.output = output
+        self.header_written = False
+        self.styles: list[str] = []
+        self.base_offset: Optional[int] = None
+        self.base_mpegts: Optional[int] = None
+        # cues of the previous fragment, [start, end, settings, text], written after the next fragment is read
+        self.pending: list[list] = []
+
+    def get_offset(self, header: str) -> int:
+        """Get ms to add to cues of a fragment by its X-TIMESTAMP-MAP"""
+
+        match = TIMESTAMP_MAP.search(header)
+        if not match:
+            return 0
+
+        mpegts = int(match.group('mpegts'))
+        if self.base_mpegts is not None and self.base_mpegts - mpegts > MPEGTS_ROLLOVER // 2:
+            mpegts += MPEGTS_ROLLOVER
+        offset = mpegts // 90 - timestamp_to_ms(*match.group(2, 3, 4, 5))
+
+        if self.base_offset is None:
+            self.base_offset = offset
+            self.base_mpegts = mpegts
+        return offset - self.base_offset
+
+    def add(self, text: str, shift: int = 0):
+        """Parse a fragment and write the cues of the previous one"""
+
+        blocks = BLANK_LINES.split(
+            text.replace('\r\n', '\n').replace('\r', '\n').lstrip('\ufeff'))
+        if not blocks or not blocks[0].startswith('WEBVTT'):
+            return
+
+        offset = self.get_offset(blocks[0]) + shift
+        cues = []
+        for block in blocks[1:]:
+            block = block.strip('\n')
+            if not block:
+                continue
+            if block.startswith(('STYLE', 'REGION')):
+                if not self.header_written and block not in self.styles:
+                    self.styles.append(block)
+                continue
+            if block.startswith('NOTE'):
+                continue
+
+            lines = block.split('\n')
+            # skip cue identifier
+            if len(lines) > 1 and '-->' not in lines[0]:
+                lines = lines[1:]
+            timing = TIMING_LINE.match(lines[0])
+            if not timing:
+                continue
+            cues.append([timestamp_to_ms(*timing.group(1, 2, 3, 4)) + offset,
+                         timestamp_to_ms(*timing.group(5, 6, 7, 8)) + offset,
+                         timing.group('settings').rstrip(),
+                         '\n'.join(lines[1:]).strip('\n')])
+
+        if not cues:
+            return
+
+        # A cue spanning the fragment boundary is repeated in the next fragment
+        repeated = {(cue[2], cue[3]): cue for cue in self.pending}
+        for cue in cues:
+            previous = repeated.get((cue[2], cue[3]))
+            if previous and cue[0] <= previous[1]:
+                previous[1] = max(previous[1], cue[1])
+                cue[3] = None
+
+        self.write(self.pending)
+        self.pending = [cue for cue in cues if cue[3] is not None]
+
+    def write(self, cues: Iterable[list]):
+        """Write header (once) and cues"""
+
+        if not self.header_written:
+            self.output.write('WEBVTT\n\n')
+            for style in self.styles:
+                self.output.write(f'{style}\n\n')
+            self.header_written = True
+
+        for start, end, settings, text in cues:
+            if text:
+                self.output.write(
+                    f'{ms_to_vtt_timestamp(start)} --> {ms_to_vtt_timestamp(end)}{settings}\n{text}\n\n')
+
+    def close(self):
+        """Write the remaining cues"""
+
+        self.write(self.pending)
+        self.pending = []
+
+
+def merge_webvtt_fragments(fragments: Iterable[tuple[str, int]], output: TextIO):
+    """Merge WebVTT fragments [(text, shift ms), ...] into output"""
+
+    merger = WebVTTMerger(output)
+    for text, shift in fragments:
+        merger.add(text, shift)
+    merger.close()
+
+
+if __name__:
+    logger = logging.getLogger(__name__)